@@ -16,6 +16,7 @@ class Company(TimeStamp):
 
     class Meta:
         verbose_name_plural = "Companies"
+        indexes = [models.Index(fields=["created_at", "id"])]
 
     def __str__(self):
         return self.name
@@ -1,7 +1,5 @@
-from rest_framework import pagination
+from backend.apps.shared.pagination import PageNumberOrKeysetPagination
 
 
-class CompanyPagination(pagination.PageNumberPagination):
+class CompanyPagination(PageNumberOrKeysetPagination):
     page_size = 5
-    page_size_query_param = "page_size"
-    max_page_size = 100
@@ -2,17 +2,17 @@ from django.shortcuts import get_object_or_404
 from rest_framework import permissions
 
 from backend.apps.company.models import Company
+from backend.apps.company.roles import CompanyRole, has_company_role
 
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
+        return obj.owner_id == request.user.id
 
 
 class IsAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        return user == obj.owner or user in obj.admins.all()
+        return has_company_role(request, obj.id, CompanyRole.OWNER, CompanyRole.ADMIN)
 
 
 class IsInvitationOwner(permissions.BasePermission):
@@ -21,14 +21,17 @@ class IsInvitationOwner(permissions.BasePermission):
             company_id = request.data.get("company")
             if not company_id:
                 return False
-            company = get_object_or_404(Company, id=company_id)
-            return company.owner == request.user
+            if has_company_role(request, company_id, CompanyRole.OWNER):
+                return True
+            # a missing company is still reported as not found
+            get_object_or_404(Company, id=company_id)
+            return False
         return True
 
     def has_object_permission(self, request, view, obj):
-        return obj.company.owner == obj.sender
+        return obj.company.owner_id == obj.sender_id
 
 
 class IsRequestOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.company.owner == request.user
+        return has_company_role(request, obj.company_id, CompanyRole.OWNER)
@@ -0,0 +1,153 @@
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import models, transaction
+from django.db.models import Case, CharField, Count, Exists, OuterRef, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from backend.apps.company.models import Company
+
+
+class CompanyRole(models.TextChoices):
+    OWNER = "owner"
+    ADMIN = "admin"
+    MEMBER = "member"
+
+
+def _roles_key(user_id: int) -> str:
+    return f"company_roles:{user_id}"
+
+
+def roles_cache_is_shared() -> bool:
+    """
+    Function to check whether the default cache is shared between processes.
+    A process-local cache cannot be invalidated from the other processes, so the roles are not cached in it.
+    """
+    return not isinstance(caches["default"], LocMemCache | DummyCache)
+
+
+def _load_company_roles(user_id: int) -> dict[int, list[str]]:
+    def role_rows(queryset, company_field, role):
+        return queryset.annotate(role=Value(role.value, output_field=CharField())).values_list(company_field, "role")
+
+    owned = role_rows(Company.objects.filter(owner_id=user_id), "id", CompanyRole.OWNER)
+    administered = role_rows(
+        Company.admins.through.objects.filter(customuser_id=user_id), "company_id", CompanyRole.ADMIN
+    )
+    joined = role_rows(Company.members.through.objects.filter(customuser_id=user_id), "company_id", CompanyRole.MEMBER)
+
+    roles = {}
+    for company_id, role in owned.union(administered, joined, all=True):
+        roles.setdefault(company_id, []).append(role)
+
+    return roles
+
+
+def _count_by_company(model) -> Coalesce:
+    rows = model.objects.filter(company_id=OuterRef("pk")).order_by().values("company_id")
+    return Coalesce(Subquery(rows.annotate(count=Count("*")).values("count")), 0)
+
+
+def annotate_company_listing(companies: QuerySet, user) -> QuerySet:
+    """
+    Function to annotate the companies with their member, admin and quiz counts and the role of the user,
+    so a company listing is read in one query.
+    Every count is its own correlated subquery, joining the relations would multiply their rows.
+    """
+    # the quiz app depends on the company app, its model is resolved through the relation
+    quiz_model = Company._meta.get_field("quizzes").related_model
+    admins = Company.admins.through.objects.filter(company_id=OuterRef("pk"), customuser_id=user.id)
+    members = Company.members.through.objects.filter(company_id=OuterRef("pk"), customuser_id=user.id)
+
+    return companies.annotate(
+        member_count=_count_by_company(Company.members.through),
+        admin_count=_count_by_company(Company.admins.through),
+        quiz_count=_count_by_company(quiz_model),
+        user_role=Case(
+            When(owner_id=user.id, then=Value(CompanyRole.OWNER.value)),
+            When(Exists(admins), then=Value(CompanyRole.ADMIN.value)),
+            When(Exists(members), then=Value(CompanyRole.MEMBER.value)),
+            output_field=CharField(),
+        ),
+    )
+
+
+def get_company_roles(user) -> dict[int, list[str]]:
+    """
+    Function to get the roles of the user in every company, as company id -> roles.
+    The roles are cached per user and invalidated when the owner, members or admins of a company change.
+    """
+    if not user.is_authenticated:
+        return {}
+
+    if not roles_cache_is_shared():
+        return _load_company_roles(user.id)
+
+    key = _roles_key(user.id)
+    roles = cache.get(key)
+
+    if roles is None:
+        roles = _load_company_roles(user.id)
+        cache.set(key, roles, timeout=settings.COMPANY_ROLES_CACHE_TIMEOUT)
+
+    return roles
+
+
+def get_request_company_roles(request) -> dict[int, list[str]]:
+    """
+    Function to get the company roles of the requesting user, memoized on the request,
+    so every permission check of the request shares one lookup.
+    """
+    # the DRF request wraps the Django request, the roles are kept on the latter so both see them
+    http_request = getattr(request, "_request", request)
+    user_id = request.user.id
+    context = getattr(http_request, "company_roles", None)
+
+    if context is None or context[0] != user_id:
+        context = (user_id, get_company_roles(request.user))
+        http_request.company_roles = context
+
+    return context[1]
+
+
+def _has_role(user, company_id: int, role: CompanyRole) -> bool:
+    if not user.is_authenticated:
+        return False
+
+    if role == CompanyRole.OWNER:
+        return Company.objects.filter(id=company_id, owner_id=user.id).exists()
+
+    relation = Company.admins if role == CompanyRole.ADMIN else Company.members
+    return relation.through.objects.filter(company_id=company_id, customuser_id=user.id).exists()
+
+
+def has_company_role(request, company_id: int | str | None, *roles: CompanyRole) -> bool:
+    """
+    Function to check whether the requesting user has any of the given roles in the company.
+    Without a shared cache every role is checked with its own indexed query.
+    """
+    try:
+        company_id = int(company_id)
+    except (TypeError, ValueError):
+        return False
+
+    if not roles_cache_is_shared():
+        return any(_has_role(request.user, company_id, role) for role in roles)
+
+    return any(role in get_request_company_roles(request).get(company_id, []) for role in roles)
+
+
+def invalidate_company_roles(user_ids) -> None:
+    """
+    Function to drop the cached roles of the users, now and once the current transaction commits,
+    so a request running before the commit cannot keep the old roles cached.
+    """
+    keys = [_roles_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+
+    cache.delete_many(keys)
+    transaction.on_commit(partial(cache.delete_many, keys))
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from backend.apps.company.models import Company, CompanyInvitation
+from backend.apps.company.roles import CompanyRole
 
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -19,6 +20,11 @@ class CompanySerializer(serializers.ModelSerializer):
 
 
 class CompanyListSerializer(serializers.ModelSerializer):
+    member_count = serializers.IntegerField(read_only=True)
+    admin_count = serializers.IntegerField(read_only=True)
+    quiz_count = serializers.IntegerField(read_only=True)
+    user_role = serializers.ChoiceField(choices=CompanyRole.choices, read_only=True, allow_null=True)
+
     class Meta:
         model = Company
         fields = "__all__"
@@ -1,9 +1,11 @@
 import logging
 
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 
 from backend.apps.company.models import Company
+from backend.apps.company.roles import invalidate_company_roles
+from backend.apps.users.models import CustomUser
 
 logger = logging.getLogger("db_operations")
 
@@ -19,3 +21,47 @@ def log_company_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Company)
 def log_company_delete(sender, instance, **kwargs):
     logger.info("Company deleted: %s (ID: %d)", instance.name, instance.id)
+
+
+@receiver(pre_save, sender=Company)
+def invalidate_previous_owner_roles(sender, instance, **kwargs):
+    if instance.pk:
+        previous_owner_id = Company.objects.filter(pk=instance.pk).values_list("owner_id", flat=True).first()
+        if previous_owner_id and previous_owner_id != instance.owner_id:
+            invalidate_company_roles([previous_owner_id])
+
+
+@receiver(post_save, sender=Company)
+def invalidate_owner_roles(sender, instance, **kwargs):
+    invalidate_company_roles([instance.owner_id])
+
+
+@receiver(pre_delete, sender=Company)
+def invalidate_company_users_roles(sender, instance, **kwargs):
+    user_ids = {instance.owner_id}
+    user_ids.update(instance.members.values_list("id", flat=True))
+    user_ids.update(instance.admins.values_list("id", flat=True))
+    invalidate_company_roles(user_ids)
+
+
+@receiver(m2m_changed, sender=Company.members.through)
+@receiver(m2m_changed, sender=Company.admins.through)
+def invalidate_membership_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    With reverse=True the instance is the user, otherwise pk_set holds the ids of the added or removed users.
+    """
+    if action in ("post_add", "post_remove"):
+        invalidate_company_roles([instance.pk] if reverse else pk_set)
+    elif action == "pre_clear":
+        if reverse:
+            invalidate_company_roles([instance.pk])
+        else:
+            users = instance.members if sender is Company.members.through else instance.admins
+            invalidate_company_roles(users.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_new_user_roles(sender, instance, created, **kwargs):
+    # a new user must not pick up roles cached for a reused id
+    if created:
+        invalidate_company_roles([instance.pk])
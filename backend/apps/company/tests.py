@@ -1,9 +1,15 @@
+from unittest import mock
+
 from django.utils.timezone import now
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
 
 from backend.apps.company.models import Company, CompanyInvitation
+from backend.apps.company.permissions import IsAdmin, IsRequestOwner
+from backend.apps.company.roles import CompanyRole, annotate_company_listing, get_company_roles, has_company_role
 from backend.apps.quiz.models import Quiz, Result
+from backend.apps.quiz.utils import record_latest_attempt, update_score_aggregates
 from backend.apps.users.models import CustomUser, UserRequest
 
 
@@ -57,9 +63,10 @@ class TestCompany(APITestCase):
         
     def test_last_completions_quizzes_success(self):
         quiz = Quiz.objects.create(title="Test Quiz", company=self.company, frequency=10)
-        Result.objects.create(
+        result = Result.objects.create(
             quiz=quiz, user=self.user, company=self.company, status=Result.QuizStatus.COMPLETED, score=80, total_question=100, updated_at=now()
         )
+        record_latest_attempt(result)
         
         response = self.client.get(f"/api/companies/companies/last-completions-quizzes/?user={self.user.id}")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -68,15 +75,86 @@ class TestCompany(APITestCase):
         
     def test_last_completions_users_success(self):
         quiz = Quiz.objects.create(title="Test Quiz", company=self.company, frequency=10)
-        Result.objects.create(
+        result = Result.objects.create(
             quiz=quiz, user=self.user, company=self.company, status=Result.QuizStatus.COMPLETED, score=10, total_question=10, updated_at=now()
         )
+        update_score_aggregates(result)
         response = self.client.get(f"/api/companies/companies/{self.company.id}/last-completions-users/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['username'], self.user.username)
-        
-        
+
+    @mock.patch("backend.apps.company.roles.roles_cache_is_shared", return_value=True)
+    def test_company_roles_are_cached_and_invalidated(self, _):
+        self.assertEqual(get_company_roles(self.user), {self.company.id: [CompanyRole.MEMBER]})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_company_roles(self.user), {self.company.id: [CompanyRole.MEMBER]})
+
+        self.company.admins.add(self.user)
+        self.assertIn(CompanyRole.ADMIN, get_company_roles(self.user)[self.company.id])
+
+        self.user.companies.remove(self.company)
+        self.assertEqual(get_company_roles(self.user), {self.company.id: [CompanyRole.ADMIN]})
+
+        self.company.admins.clear()
+        self.assertEqual(get_company_roles(self.user), {})
+
+    @mock.patch("backend.apps.company.roles.roles_cache_is_shared", return_value=True)
+    def test_company_roles_are_resolved_once_per_request(self, _):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = self.owner
+        company_request = UserRequest.objects.create(sender=self.user, company=self.company)
+
+        with mock.patch("backend.apps.company.roles.get_company_roles", wraps=get_company_roles) as roles:
+            self.assertTrue(IsAdmin().has_object_permission(request, None, self.company))
+            self.assertTrue(IsRequestOwner().has_object_permission(request, None, company_request))
+            self.assertFalse(has_company_role(request, self.company.id + 1, CompanyRole.OWNER))
+
+        roles.assert_called_once_with(self.owner)
+
+    def test_company_roles_are_queried_without_a_shared_cache(self):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = self.user
+        self.assertTrue(has_company_role(request, self.company.id, CompanyRole.MEMBER))
+
+        # another process removing the membership is seen by the next check
+        Company.members.through.objects.filter(company=self.company, customuser=self.user).delete()
+        with self.assertNumQueries(2):
+            self.assertFalse(has_company_role(request, self.company.id, CompanyRole.OWNER, CompanyRole.MEMBER))
+
+
+    def test_company_list_counts_and_role(self):
+        other_company = Company.objects.create(name="Other Company", owner=self.user)
+        other_company.members.add(self.user, self.owner)
+        other_company.admins.add(self.owner)
+        Quiz.objects.create(title="Quiz 1", company=self.company, frequency=1)
+        Quiz.objects.create(title="Quiz 2", company=self.company, frequency=1)
+        Company.objects.create(name="Foreign Company", owner=self.user)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(f"/api/companies/companies/?member_id={self.owner.id}")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        companies = {company["id"]: company for company in response.data["results"]}
+        self.assertEqual(set(companies), {self.company.id, other_company.id})
+        self.assertEqual(
+            [companies[self.company.id][field] for field in ["member_count", "admin_count", "quiz_count", "user_role"]],
+            [2, 0, 2, CompanyRole.OWNER],
+        )
+        self.assertEqual(
+            [companies[other_company.id][field] for field in ["member_count", "admin_count", "quiz_count", "user_role"]],
+            [2, 1, 0, CompanyRole.ADMIN],
+        )
+
+        response = self.client.get("/api/companies/companies/")
+        roles = {company["name"]: company["user_role"] for company in response.data["results"]}
+        self.assertIsNone(roles["Foreign Company"])
+
+        # the counts are subqueries, the relations are not joined to the company rows
+        self.assertNotIn("JOIN", str(annotate_company_listing(Company.objects.all(), self.owner).query))
+
+
 class TestCompanyInvitation(APITestCase):
     def setUp(self):
         self.owner = CustomUser.objects.create_user(
@@ -168,3 +246,4 @@ class TestCompanyRequest(APITestCase):
         request.refresh_from_db()
         self.assertEqual(request.status, UserRequest.StatusChoices.REJECTED)
         self.assertEqual(response.data["status"], "R")
+
@@ -1,4 +1,4 @@
-from django.db.models import Max
+from django.db.models import F, Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
@@ -11,15 +11,15 @@ from backend.apps.company.filters import CompanyFilter
 from backend.apps.company.models import Company
 from backend.apps.company.pagination import CompanyPagination
 from backend.apps.company.permissions import IsAdmin, IsOwner
+from backend.apps.company.roles import annotate_company_listing
 from backend.apps.company.serializers import (
     CompanyListSerializer,
     CompanySerializer,
     QuizLastCompletionSerializer,
     UserLastCompletionSerializer,
 )
-from backend.apps.quiz.enums import FileFormatEnum
-from backend.apps.quiz.models import Quiz, Result
-from backend.apps.quiz.utils import export_csv, export_json
+from backend.apps.quiz.models import Quiz
+from backend.apps.quiz.utils import export_results
 from backend.apps.users.models import CustomUser
 from backend.apps.users.serializers import UserListSerializer
 
@@ -31,6 +31,17 @@ class CompanyViewset(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = CompanyFilter
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ["list", "retrieve"]:
+            users = CustomUser.objects.only("id")
+            queryset = (
+                annotate_company_listing(queryset, self.request.user)
+                .prefetch_related(Prefetch("members", queryset=users), Prefetch("admins", queryset=users))
+                .order_by("id")
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
             return CompanyListSerializer
@@ -130,24 +141,9 @@ class CompanyViewset(viewsets.ModelViewSet):
         """
         company = self.get_object()
         user_id = request.query_params.get("user")
-        file_format = request.query_params.get("file_format")
+        user = get_object_or_404(CustomUser, id=user_id) if user_id else None
 
-        if not user_id:
-            results_queryset = Result.objects.filter(
-                status=Result.QuizStatus.COMPLETED, quiz__company=company
-            ).select_related("quiz")
-        else:
-            user = get_object_or_404(CustomUser, id=user_id)
-            results_queryset = Result.objects.filter(
-                user=user, status=Result.QuizStatus.COMPLETED, quiz__company=company
-            ).select_related("quiz")
-
-        if file_format == FileFormatEnum.CSV.value:
-            return export_csv(results_queryset)
-        elif file_format == FileFormatEnum.JSON.value:
-            return export_json(results_queryset)
-
-        return Response({"detail": _("Invalid format.")}, status=status.HTTP_400_BAD_REQUEST)
+        return export_results(request, user=user, company=company)
 
     @action(detail=False, methods=["get"], url_path="last-completions-quizzes", permission_classes=[IsOwner, IsAdmin])
     def last_completions_quizzes(self, request, pk=None):
@@ -159,8 +155,8 @@ class CompanyViewset(viewsets.ModelViewSet):
         user = get_object_or_404(CustomUser, id=user_id)
 
         last_completions = (
-            Quiz.objects.filter(results__status=Result.QuizStatus.COMPLETED, results__user=user)
-            .annotate(last_completed_at=Max("results__updated_at"))
+            Quiz.objects.filter(latest_attempts__user=user)
+            .annotate(last_completed_at=F("latest_attempts__completed_at"))
             .values("id", "title", "last_completed_at")
         )
 
@@ -175,9 +171,10 @@ class CompanyViewset(viewsets.ModelViewSet):
     def last_completions_users(self, request, pk=None):
         company = self.get_object()
 
+        # the per company score aggregate keeps the last completion of the user in the company
         last_completions = (
-            CustomUser.objects.filter(results__quiz__company=company, results__status=Result.QuizStatus.COMPLETED)
-            .annotate(last_completed_at=Max("results__updated_at"))
+            CustomUser.objects.filter(company_score_aggregates__company=company)
+            .annotate(last_completed_at=F("company_score_aggregates__last_completed_at"))
             .values("id", "username", "last_completed_at")
         )
 
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from channels.layers import BaseChannelLayer
+from channels_redis.core import RedisChannelLayer
+
+logger = logging.getLogger(__name__)
+
+SCORE_STEP = 1e-6
+
+# Same delivery rules as RedisChannelLayer.group_send, but the keys may repeat and the expired messages
+# of every channel are discarded in the script, so a whole batch of groups takes a single call per shard.
+# ARGV holds a (message, capacity, score) triple per key followed by the key expiry and the score
+# below which messages are expired.
+GROUP_SEND_MANY_LUA = """
+    local over_capacity = 0
+    local expiry = ARGV[#ARGV - 1]
+    local expired_before = ARGV[#ARGV]
+    for i=1,#KEYS do
+        redis.call('ZREMRANGEBYSCORE', KEYS[i], 0, expired_before)
+        if redis.call('ZCOUNT', KEYS[i], '-inf', '+inf') < tonumber(ARGV[i * 3 - 1]) then
+            redis.call('ZADD', KEYS[i], ARGV[i * 3], ARGV[i * 3 - 2])
+            redis.call('EXPIRE', KEYS[i], expiry)
+        else
+            over_capacity = over_capacity + 1
+        end
+    end
+    return over_capacity
+"""
+
+
+async def _get_group_channels(layer: RedisChannelLayer, groups: list[str], now: float) -> list[list[str]]:
+    """
+    Function to read the channels of every group with one pipeline per shard.
+    """
+    positions_by_connection = defaultdict(list)
+    for position, group in enumerate(groups):
+        assert layer.valid_group_name(group), "Group name not valid"
+        positions_by_connection[layer.consistent_hash(group)].append(position)
+
+    channels = [[] for _group in groups]
+    for index, positions in positions_by_connection.items():
+        pipe = layer.connection(index).pipeline(transaction=False)
+        for position in positions:
+            key = layer._group_key(groups[position])
+            # discard old channels based on group_expiry, like group_send does
+            pipe.zremrangebyscore(key, min=0, max=int(now) - layer.group_expiry)
+            pipe.zrange(key, 0, -1)
+
+        replies = await pipe.execute()
+        for position, channel_names in zip(positions, replies[1::2], strict=True):
+            channels[position] = [channel_name.decode("utf8") for channel_name in channel_names]
+
+    return channels
+
+
+async def _redis_group_send_many(layer: RedisChannelLayer, messages: list[tuple[str, dict]]) -> None:
+    now = time.time()
+    channels = await _get_group_channels(layer, [group for group, _message in messages], now)
+
+    # one delivery per channel key and message, process-local channels of one key share the delivery
+    deliveries_by_connection = defaultdict(dict)
+    capacities = {}
+    for position, ((_group, message), channel_names) in enumerate(zip(messages, channels, strict=True)):
+        for channel in channel_names:
+            channel_non_local_name = layer.non_local_name(channel)
+            channel_key = layer.prefix + channel_non_local_name
+            deliveries = deliveries_by_connection[layer.consistent_hash(channel_non_local_name)]
+
+            if (channel_key, position) not in deliveries:
+                deliveries[(channel_key, position)] = {**message, "__asgi_channel__": []}
+                capacities[channel_key] = layer.get_capacity(channel)
+            deliveries[(channel_key, position)]["__asgi_channel__"].append(channel)
+
+    over_capacity = 0
+    deliveries_count = 0
+    for index, deliveries in deliveries_by_connection.items():
+        deliveries_count += len(deliveries)
+        keys = [channel_key for channel_key, _position in deliveries]
+        args = []
+        for (channel_key, position), message in deliveries.items():
+            # messages are popped by lowest score, the offset keeps the order of the batch within a channel
+            args += [layer.serialize(message), capacities[channel_key], repr(now + position * SCORE_STEP)]
+        args += [layer.expiry, int(now) - int(layer.expiry)]
+
+        over_capacity += await layer.connection(index).eval(GROUP_SEND_MANY_LUA, len(keys), *keys, *args)
+
+    if over_capacity:
+        logger.info("%s of %s deliveries over capacity in bulk group send", over_capacity, deliveries_count)
+
+
+async def group_send_many(layer: BaseChannelLayer, messages: list[tuple[str, dict]]) -> None:
+    """
+    Function to send a message to each of many groups.
+    On the Redis channel layer all groups are resolved with one pipeline and all messages are stored
+    with one Lua script call per shard; other layers send the messages concurrently.
+    """
+    if not messages:
+        return
+
+    if isinstance(layer, RedisChannelLayer):
+        await _redis_group_send_many(layer, messages)
+    else:
+        await asyncio.gather(*(layer.group_send(group, message) for group, message in messages))
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from channels.layers import get_channel_layer
+from channels_redis.core import RedisChannelLayer
+from django.core.management.base import BaseCommand
+
+from backend.apps.notification.layers import group_send_many
+from backend.apps.shared.utils import batched
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one group_send per user with the bulk group send on the configured channel layer. "
+        "Redis layers use a separate key prefix that is flushed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, default=5000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        layer = get_channel_layer()
+        if isinstance(layer, RedisChannelLayer):
+            layer = RedisChannelLayer(hosts=layer.hosts, prefix="asgi-benchmark")
+
+        asyncio.run(self._benchmark(layer, options["groups"], options["batch_size"]))
+
+    async def _benchmark(self, layer, groups_count, batch_size):
+        groups = [f"notifications_benchmark_{index}" for index in range(groups_count)]
+        channels = [await layer.new_channel() for _group in groups]
+        for group, channel in zip(groups, channels, strict=True):
+            await layer.group_add(group, channel)
+
+        message = {"type": "send_notification", "notification": "Benchmark notification"}
+        try:
+            started = time.perf_counter()
+            for group in groups:
+                await layer.group_send(group, message)
+            self._report("group_send per group", groups_count, time.perf_counter() - started)
+            await self._drain(layer, channels)
+
+            started = time.perf_counter()
+            for batch in batched(groups, batch_size):
+                await group_send_many(layer, [(group, message) for group in batch])
+            self._report(f"group_send_many in batches of {batch_size}", groups_count, time.perf_counter() - started)
+            await self._drain(layer, channels)
+        finally:
+            await layer.flush()
+
+    @staticmethod
+    async def _drain(layer, channels):
+        for channel in channels:
+            await layer.receive(channel)
+
+    def _report(self, label, groups_count, elapsed):
+        self.stdout.write(
+            f"{label}: {groups_count} messages in {elapsed:.2f}s ({groups_count / elapsed:.0f} per second)"
+        )
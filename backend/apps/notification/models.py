@@ -13,3 +13,7 @@ class Notification(TimeStamp):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="notifications")
     status = models.CharField(max_length=10, choices=NotificationStatus.choices, default=NotificationStatus.UNREAD)
     text = models.TextField()
+
+    class Meta:
+        # notifications are always listed per user
+        indexes = [models.Index(fields=["user", "created_at", "id"])]
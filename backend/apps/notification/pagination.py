@@ -0,0 +1,6 @@
+from backend.apps.shared.pagination import PageNumberOrKeysetPagination
+
+
+class NotificationPagination(PageNumberOrKeysetPagination):
+    page_size = 20
+    ordering = ("-created_at", "-id")
@@ -0,0 +1,43 @@
+import logging
+import time
+
+from celery import shared_task
+
+from backend.apps.notification.utils import notify_users
+from backend.apps.quiz.models import Quiz
+from backend.apps.shared.utils import batched
+
+logger = logging.getLogger(__name__)
+
+FAN_OUT_BATCH_SIZE = 1000
+
+
+@shared_task
+def fan_out_quiz_notification(quiz_id: int) -> dict[str, int | float]:
+    """
+    Task to notify every member of the quiz company about a new quiz, one batch of members at a time.
+    """
+    quiz = Quiz.objects.select_related("company").filter(id=quiz_id).first()
+    if quiz is None:
+        return {"notifications": 0, "seconds": 0.0}
+
+    text = f"New quiz '{quiz.title}' is available. Take the quiz now!"
+    member_ids = (
+        quiz.company.members.order_by("id").values_list("id", flat=True).iterator(chunk_size=FAN_OUT_BATCH_SIZE)
+    )
+
+    started = time.perf_counter()
+    sent = 0
+    for batch in batched(member_ids, FAN_OUT_BATCH_SIZE):
+        notify_users(batch, text)
+        sent += len(batch)
+    elapsed = time.perf_counter() - started
+
+    logger.info(
+        "Sent %d notifications for quiz %d in %.2fs (%.0f per second)",
+        sent,
+        quiz.id,
+        elapsed,
+        sent / elapsed if elapsed else 0,
+    )
+    return {"notifications": sent, "seconds": round(elapsed, 3)}
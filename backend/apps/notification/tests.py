@@ -1,3 +1,217 @@
-from django.test import TestCase
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels_redis.core import RedisChannelLayer
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from backend.apps.company.models import Company
+from backend.apps.notification.layers import group_send_many
+from backend.apps.notification.models import Notification
+from backend.apps.notification.tasks import fan_out_quiz_notification
+from backend.apps.notification.utils import notify_users
+from backend.apps.quiz.models import Quiz
+from backend.apps.users.models import CustomUser
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class QuizNotificationTest(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username="owner", password="testpassword")
+        self.members = CustomUser.objects.bulk_create([CustomUser(username=f"member_{index}") for index in range(5)])
+        self.company = Company.objects.create(name="Test Company", owner=self.owner)
+        self.company.members.add(*self.members)
+
+    def test_quiz_creation_enqueues_fan_out_after_commit(self):
+        with mock.patch("backend.apps.notification.signals.fan_out_quiz_notification.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                quiz = Quiz.objects.create(title="Sample Quiz", frequency=1, company=self.company)
+
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        delay.assert_called_once_with(quiz.id)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_fan_out_notifies_members_in_batches(self):
+        with mock.patch("backend.apps.notification.signals.fan_out_quiz_notification.delay"):
+            quiz = Quiz.objects.create(title="Sample Quiz", frequency=1, company=self.company)
+
+        channel_layer = get_channel_layer()
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(f"notifications_{self.members[-1].id}", channel_name)
+
+        with mock.patch("backend.apps.notification.tasks.FAN_OUT_BATCH_SIZE", 2):
+            with mock.patch("backend.apps.notification.tasks.notify_users", wraps=notify_users) as notify:
+                metrics = fan_out_quiz_notification(quiz.id)
+
+        self.assertEqual(metrics["notifications"], 5)
+        self.assertEqual([len(call.args[0]) for call in notify.call_args_list], [2, 2, 1])
+        self.assertEqual(Notification.objects.filter(text__contains="'Sample Quiz'").count(), 5)
+
+        message = async_to_sync(channel_layer.receive)(channel_name)
+        self.assertEqual(message["notification"], "New quiz 'Sample Quiz' is available. Take the quiz now!")
+
+
+
+class NotificationListTest(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="user", password="testpassword")
+        Notification.objects.bulk_create([Notification(user=self.user, text=f"Notification {index}") for index in range(5)])
+        Notification.objects.create(user=CustomUser.objects.create_user(username="other"), text="Other notification")
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_is_paginated_by_page_number(self):
+        response = self.client.get("/api/notification/notifications/?page_size=2")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_list_is_paginated_by_cursor(self):
+        url = "/api/notification/notifications/?pagination=cursor&page_size=2"
+        texts = []
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertNotIn("count", response.data)
+
+        while True:
+            texts += [notification["text"] for notification in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(texts, [f"Notification {index}" for index in reversed(range(5))])
+
+    def test_cursor_pages_split_rows_with_the_same_created_at(self):
+        Notification.objects.filter(user=self.user).update(created_at=timezone.now())
+        url = "/api/notification/notifications/?pagination=cursor&page_size=2"
+        pages = []
+
+        response = self.client.get(url)
+        while True:
+            pages.append([notification["id"] for notification in response.data["results"]])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        ids = list(Notification.objects.filter(user=self.user).order_by("-id").values_list("id", flat=True))
+        self.assertEqual(sum(pages, []), ids)
+
+        previous_pages = []
+        while response.data["previous"]:
+            response = self.client.get(response.data["previous"])
+            previous_pages.insert(0, [notification["id"] for notification in response.data["results"]])
+        self.assertEqual(previous_pages, pages[:-1])
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+class RedisGroupSendManyTest(SimpleTestCase):
+    """
+    Runs the bulk send Lua script against fakeredis (with lupa), one fake server per shard of the layer.
+    """
+
+    def setUp(self):
+        self.layer = RedisChannelLayer(hosts=["redis://shard-0", "redis://shard-1"], capacity=2, expiry=60)
+        self.connections = [fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()) for _host in range(2)]
+        patcher = mock.patch.object(self.layer, "connection", side_effect=lambda index: self.connections[index])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def channel_key(self, channel):
+        channel_non_local_name = self.layer.non_local_name(channel)
+        connection = self.connections[self.layer.consistent_hash(channel_non_local_name)]
+        return connection, self.layer.prefix + channel_non_local_name
+
+    def stored_messages(self, channel):
+        """
+        Messages waiting in the channel, in the order they are received.
+        """
+        connection, key = self.channel_key(channel)
+        return [self.layer.deserialize(message) for message in async_to_sync(connection.zrange)(key, 0, -1)]
+
+    def group_send_many(self, messages):
+        async_to_sync(group_send_many)(self.layer, messages)
+
+    def test_delivers_to_every_channel_of_every_group(self):
+        groups = {f"group_{index}": [f"channel_{index}_a", f"channel_{index}_b"] for index in range(12)}
+        for group, channels in groups.items():
+            for channel in channels:
+                async_to_sync(self.layer.group_add)(group, channel)
+        # the groups and channels are spread over both shards
+        self.assertEqual({self.layer.consistent_hash(group) for group in groups}, {0, 1})
+        self.assertEqual({self.layer.consistent_hash(channel) for channel in groups["group_0"] + groups["group_1"]}, {0, 1})
+
+        self.group_send_many([(group, {"type": "notify", "group": group}) for group in groups])
+
+        for group, channels in groups.items():
+            for channel in channels:
+                self.assertEqual(
+                    self.stored_messages(channel), [{"type": "notify", "group": group, "__asgi_channel__": [channel]}]
+                )
+
+    def test_process_local_channels_share_a_delivery(self):
+        first, second = "specific.process!first", "specific.process!second"
+        async_to_sync(self.layer.group_add)("group", first)
+        async_to_sync(self.layer.group_add)("group", second)
+
+        self.group_send_many([("group", {"type": "notify"})])
+
+        self.assertEqual(self.stored_messages(first), [{"type": "notify", "__asgi_channel__": [first, second]}])
+
+    def test_messages_keep_the_order_of_the_batch(self):
+        groups = [f"group_{index}" for index in range(10)]
+        self.layer.capacity = len(groups)
+        for group in groups:
+            async_to_sync(self.layer.group_add)(group, "channel")
+
+        self.group_send_many([(group, {"type": "notify", "group": group}) for group in groups])
+
+        self.assertEqual([message["group"] for message in self.stored_messages("channel")], groups)
+
+    def test_messages_over_capacity_are_dropped(self):
+        groups = ["first", "second", "third"]
+        for group in groups:
+            async_to_sync(self.layer.group_add)(group, "channel")
+
+        with self.assertLogs("backend.apps.notification.layers", level="INFO") as logs:
+            self.group_send_many([(group, {"type": "notify", "group": group}) for group in groups])
+
+        self.assertIn("1 of 3 deliveries over capacity", logs.output[0])
+        self.assertEqual([message["group"] for message in self.stored_messages("channel")], ["first", "second"])
+
+    def test_expired_messages_are_discarded_before_counting_capacity(self):
+        async_to_sync(self.layer.group_add)("group", "channel")
+        connection, key = self.channel_key("channel")
+        expired_score = time.time() - self.layer.expiry - 10
+        old_messages = {self.layer.serialize({"type": "notify", "sent": index}): expired_score for index in range(2)}
+        async_to_sync(connection.zadd)(key, old_messages)
+
+        self.group_send_many([("group", {"type": "notify", "sent": "new"})])
+
+        self.assertEqual(self.stored_messages("channel"), [{"type": "notify", "sent": "new", "__asgi_channel__": ["channel"]}])
+        self.assertEqual(async_to_sync(connection.ttl)(key), self.layer.expiry)
+
+    def test_expired_group_members_are_skipped(self):
+        async_to_sync(self.layer.group_add)("group", "expired_channel")
+        async_to_sync(self.layer.group_add)("group", "channel")
+        connection = self.connections[self.layer.consistent_hash("group")]
+        group_key = self.layer._group_key("group")
+        async_to_sync(connection.zadd)(group_key, {"expired_channel": 0})
+
+        self.group_send_many([("group", {"type": "notify"})])
+
+        self.assertEqual(self.stored_messages("expired_channel"), [])
+        self.assertEqual(async_to_sync(connection.zrange)(group_key, 0, -1), [b"channel"])
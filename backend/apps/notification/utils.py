@@ -0,0 +1,36 @@
+from channels.consumer import async_to_sync
+from channels.layers import get_channel_layer
+
+from backend.apps.notification.layers import group_send_many
+from backend.apps.notification.models import Notification
+
+
+def notify_user(user_id: int, text: str) -> Notification:
+    """
+    Function to store a notification for the user and push it to the user's websocket group.
+    """
+    notification = Notification.objects.create(user_id=user_id, text=text)
+
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"notifications_{user_id}",
+        {
+            "type": "send_notification",
+            "notification": notification.text,
+        },
+    )
+
+    return notification
+
+
+def notify_users(user_ids: list[int], text: str) -> list[Notification]:
+    """
+    Function to store the same notification for a batch of users with one insert
+    and push it to their websocket groups with one bulk group send.
+    """
+    notifications = Notification.objects.bulk_create([Notification(user_id=user_id, text=text) for user_id in user_ids])
+
+    message = {"type": "send_notification", "notification": text}
+    async_to_sync(group_send_many)(get_channel_layer(), [(f"notifications_{user_id}", message) for user_id in user_ids])
+
+    return notifications
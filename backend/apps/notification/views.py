@@ -3,6 +3,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 
 from backend.apps.notification.models import Notification
+from backend.apps.notification.pagination import NotificationPagination
 from backend.apps.notification.serializers import NotificationSerializer
 from backend.apps.shared.utils import update_instance_status
 
@@ -10,10 +11,11 @@ from backend.apps.shared.utils import update_instance_status
 class NotificationReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
         user = self.request.user
-        return Notification.objects.filter(user=user)
+        return Notification.objects.filter(user=user).order_by("-created_at", "-id")
 
     @action(detail=True, methods=["patch"], permission_classes=[IsAuthenticated], url_path="mark-read")
     def mark_read(self, request, pk=None):
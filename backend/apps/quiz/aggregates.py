@@ -0,0 +1,34 @@
+from collections.abc import Iterable
+
+from django.db.models import Count, Max, Sum
+from django.db.models.query import QuerySet
+
+from backend.apps.quiz.models import Result, UserCompanyScoreAggregate
+
+
+def score_totals() -> dict:
+    """
+    Function to build the aggregate expressions of the score aggregate fields over completed results.
+    """
+    return {
+        "total_correct": Sum("score"),
+        "total_questions": Sum("total_question"),
+        "completions": Count("id"),
+        "last_completed_at": Max("updated_at"),
+    }
+
+
+def rebuild_company_score_aggregates(user_ids: Iterable[int] | QuerySet, company_ids: Iterable[int]) -> None:
+    """
+    Function to recompute the per company score aggregates of the users in the companies from their completed
+    results, after results moved from one company to another.
+    """
+    UserCompanyScoreAggregate.objects.filter(user_id__in=user_ids, company_id__in=company_ids).delete()
+    rows = (
+        Result.objects.completed()
+        .filter(user_id__in=user_ids, company_id__in=company_ids)
+        .order_by()
+        .values("user_id", "company_id")
+        .annotate(**score_totals())
+    )
+    UserCompanyScoreAggregate.objects.bulk_create([UserCompanyScoreAggregate(**row) for row in rows])
@@ -0,0 +1,64 @@
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(quiz_id: int) -> str:
+    return f"quiz:{quiz_id}:version"
+
+
+def _content_key(quiz_id: int, version: int, name: str) -> str:
+    return f"quiz:{quiz_id}:v{version}:{name}"
+
+
+def get_quiz_content_version(quiz_id: int) -> int:
+    """
+    Function to get the current content version of the quiz.
+    A missing (never set or evicted) version is initialized from the clock, so it is always
+    newer than any version that may still have content cached under it.
+    """
+    key = _version_key(quiz_id)
+    version = cache.get(key)
+
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def _bump_quiz_content_version(quiz_id: int) -> None:
+    key = _version_key(quiz_id)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_quiz_content_version(quiz_id: int) -> None:
+    """
+    Function to invalidate every cached piece of the quiz content.
+    The version is bumped after the current transaction commits, so the old content can't be
+    re-cached under the new version by a concurrent reader.
+    """
+    transaction.on_commit(partial(_bump_quiz_content_version, quiz_id))
+
+
+def get_quiz_content(quiz_id: int, name: str, loader: Callable[[], Any]) -> Any:
+    """
+    Function to get a piece of the quiz content from the cache, loading and caching it on a miss.
+    """
+    key = _content_key(quiz_id, get_quiz_content_version(quiz_id), name)
+    value = cache.get(key)
+
+    if value is None:
+        value = loader()
+        cache.set(key, value, timeout=settings.QUIZ_CACHE_TIMEOUT)
+
+    return value
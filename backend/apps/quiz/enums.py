@@ -4,3 +4,13 @@ import enum
 class FileFormatEnum(enum.Enum):
     CSV = "csv"
     JSON = "json"
+    NDJSON = "ndjson"
+    CSV_GZIP = "csv.gz"
+    NDJSON_GZIP = "ndjson.gz"
+    PARQUET = "parquet"
+
+
+class TimeBucketEnum(enum.Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
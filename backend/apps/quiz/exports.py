@@ -0,0 +1,231 @@
+import csv
+import json
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.db.models import F
+from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
+
+from backend.apps.company.models import Company
+from backend.apps.quiz.enums import FileFormatEnum
+from backend.apps.quiz.models import Quiz, Result
+from backend.apps.shared.utils import batched
+from backend.apps.users.models import CustomUser
+
+EXPORT_FIELDS = ["id", "user", "company", "quiz", "score", "date_passed"]
+CSV_HEADER = ["id", "user", "company", "quiz", "score", "date passed"]
+DATE_PASSED_FORMAT = "%Y-%m-%d %H:%M:%S"
+EXPORT_CHUNK_SIZE = 2000
+STREAM_BUFFER_SIZE = 64 * 1024
+PARQUET_BATCH_SIZE = 50_000
+PARQUET_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("user", pa.string()),
+        ("company", pa.string()),
+        ("quiz", pa.string()),
+        ("score", pa.int64()),
+        ("date_passed", pa.timestamp("us")),
+    ]
+)
+
+
+class Echo:
+    """
+    File-like object that returns the written value instead of storing it, so csv.writer can be streamed.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def get_results_export_queryset(
+    quiz: Quiz | None = None, user: CustomUser | None = None, company: Company | None = None
+) -> QuerySet:
+    """
+    Function to build the query for the completed results export, shared by the quiz and company viewsets.
+    Only the exported columns are selected, joined with the username, company name and quiz title.
+    """
+    results = Result.objects.completed()
+
+    if quiz:
+        results = results.for_quiz(quiz)
+    if user:
+        results = results.for_user(user)
+    if company:
+        results = results.for_company(company)
+
+    return results.order_by("id").values(
+        "id",
+        "score",
+        "updated_at",
+        username=F("user__username"),
+        company_name=F("company__name"),
+        quiz_title=F("quiz__title"),
+    )
+
+
+def iter_export_rows(results: QuerySet) -> Iterator[dict]:
+    """
+    Function to read the projected results in chunks and format every row.
+    """
+    for result in results.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            "id": result["id"],
+            "user": result["username"],
+            "company": result["company_name"],
+            "quiz": result["quiz_title"],
+            "score": result["score"],
+            "date_passed": result["updated_at"].strftime(DATE_PASSED_FORMAT),
+        }
+
+
+def buffer_chunks(chunks: Iterable[str], buffer_size: int = STREAM_BUFFER_SIZE) -> Iterator[str]:
+    """
+    Function to join small chunks, so the response is not flushed once per row.
+    """
+    buffer = []
+    buffered = 0
+
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+
+        if buffered >= buffer_size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def iter_csv(rows: Iterable[dict]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_json(rows: Iterable[dict]) -> Iterator[str]:
+    """
+    Function to write the rows as one JSON array, item by item.
+    """
+    yield "["
+    separator = "\n"
+
+    for row in rows:
+        yield separator + json.dumps(row)
+        separator = ",\n"
+
+    yield "\n]"
+
+
+def iter_ndjson(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def encode_chunks(write: Callable[[Iterable[dict]], Iterator[str]]) -> Callable[[Iterable[dict]], Iterator[bytes]]:
+    def stream(rows: Iterable[dict]) -> Iterator[bytes]:
+        for chunk in buffer_chunks(write(rows)):
+            yield chunk.encode()
+
+    return stream
+
+
+def gzip_chunks(stream: Callable[[Iterable[dict]], Iterator[bytes]]) -> Callable[[Iterable[dict]], Iterator[bytes]]:
+    def compressed(rows: Iterable[dict]) -> Iterator[bytes]:
+        # wbits=31 writes the gzip container, so the output is a regular .gz file
+        compressor = zlib.compressobj(wbits=31)
+
+        for chunk in stream(rows):
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    return compressed
+
+
+class ChunkSink:
+    """
+    Write-only file-like object collecting the bytes written by the Parquet writer until they are drained.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_parquet(rows: Iterable[dict]) -> Iterator[bytes]:
+    """
+    Function to write the rows as Parquet, one row group per batch of rows built as a pandas DataFrame.
+    """
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression="snappy")
+
+    try:
+        for batch in batched(rows, PARQUET_BATCH_SIZE):
+            frame = pd.DataFrame.from_records(batch, columns=EXPORT_FIELDS)
+            frame["date_passed"] = pd.to_datetime(frame["date_passed"], format=DATE_PASSED_FORMAT)
+            writer.write_table(pa.Table.from_pandas(frame, schema=PARQUET_SCHEMA, preserve_index=False))
+
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+
+    yield sink.drain()
+
+
+class ExportFormat(NamedTuple):
+    stream: Callable[[Iterable[dict]], Iterator[bytes]]
+    content_type: str
+    extension: str
+
+
+EXPORT_FORMATS: dict[str, ExportFormat] = {
+    FileFormatEnum.CSV.value: ExportFormat(encode_chunks(iter_csv), "text/csv", "csv"),
+    FileFormatEnum.JSON.value: ExportFormat(encode_chunks(iter_json), "application/json", "json"),
+    FileFormatEnum.NDJSON.value: ExportFormat(encode_chunks(iter_ndjson), "application/x-ndjson", "ndjson"),
+    FileFormatEnum.CSV_GZIP.value: ExportFormat(gzip_chunks(encode_chunks(iter_csv)), "application/gzip", "csv.gz"),
+    FileFormatEnum.NDJSON_GZIP.value: ExportFormat(
+        gzip_chunks(encode_chunks(iter_ndjson)), "application/gzip", "ndjson.gz"
+    ),
+    FileFormatEnum.PARQUET.value: ExportFormat(iter_parquet, "application/vnd.apache.parquet", "parquet"),
+}
+
+
+def export_response(results: QuerySet, file_format: str) -> StreamingHttpResponse:
+    export_format = EXPORT_FORMATS[file_format]
+
+    return StreamingHttpResponse(
+        export_format.stream(iter_export_rows(results)),
+        content_type=export_format.content_type,
+        headers={"Content-Disposition": f'attachment; filename="quiz_results.{export_format.extension}"'},
+    )
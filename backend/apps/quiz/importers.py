@@ -0,0 +1,285 @@
+import os
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+
+import openpyxl
+import pandas as pd
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from backend.apps.company.models import Company
+from backend.apps.quiz.cache import bump_quiz_content_version
+from backend.apps.quiz.models import Answer, Question, Quiz
+from backend.apps.quiz.reminders import reschedule_quiz_reminders
+from backend.apps.shared.utils import batched
+
+REQUIRED_COLUMNS = ["Quiz Title", "Description", "Frequency", "Question Text", "Answer Text", "Is Correct"]
+TEXT_COLUMNS = ["Quiz Title", "Question Text", "Answer Text"]
+TRUE_VALUES = {"true", "1", "1.0", "yes", "y"}
+FALSE_VALUES = {"false", "0", "0.0", "no", "n"}
+BULK_BATCH_SIZE = 2000
+IMPORT_CHUNK_SIZE = 5000
+EXCEL_EXTENSIONS = {".xlsx", ".xlsm"}
+CSV_EXTENSIONS = {".csv"}
+# the header takes the first row of the sheet
+FIRST_DATA_ROW = 2
+
+
+class QuizImport:
+    """
+    Collects the rows of a quiz import file, validates them and saves every quiz of the file in one transaction.
+    An existing quiz of the company with the same title is updated and its questions are replaced.
+    """
+
+    def __init__(self, company: Company):
+        self.company = company
+        self.row_errors = defaultdict(list)
+        self.quizzes = {}
+        self.rows_count = 0
+
+    def add_frame(self, frame: pd.DataFrame, first_row: int = FIRST_DATA_ROW) -> None:
+        """
+        Method to validate a frame of rows with vectorized checks and collect the valid ones.
+        The frame index is the position of the row after the header, blank rows are skipped.
+        """
+        missing_columns = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+        if missing_columns:
+            raise serializers.ValidationError(
+                {"detail": _("File must contain the required columns: ") + ", ".join(REQUIRED_COLUMNS)}
+            )
+
+        frame = frame[REQUIRED_COLUMNS].dropna(how="all")
+        rows = pd.Series(frame.index + first_row, index=frame.index)
+        self.rows_count += len(frame)
+
+        texts = {column: frame[column].astype("string").str.strip() for column in TEXT_COLUMNS}
+        description = frame["Description"].astype("string").str.strip()
+        frequency = pd.to_numeric(frame["Frequency"], errors="coerce")
+        is_correct = frame["Is Correct"].astype("string").str.strip().str.lower()
+
+        checks = [
+            (texts[column].isna() | (texts[column] == ""), _("%s is required.") % column) for column in TEXT_COLUMNS
+        ]
+        checks += [
+            (texts["Answer Text"].str.len() > Answer._meta.get_field("text").max_length, _("Answer Text is too long.")),
+            (texts["Quiz Title"].str.len() > Quiz._meta.get_field("title").max_length, _("Quiz Title is too long.")),
+            (frequency.isna() | (frequency < 0) | (frequency % 1 != 0), _("Frequency must be a non-negative integer.")),
+            (~is_correct.isin(TRUE_VALUES | FALSE_VALUES), _("Is Correct must be true or false.")),
+            (
+                frame.assign(**texts).duplicated(TEXT_COLUMNS, keep="first") & texts["Answer Text"].notna(),
+                _("Answer is duplicated within the question."),
+            ),
+        ]
+
+        invalid = pd.Series(False, index=frame.index)
+        for mask, message in checks:
+            mask = mask.fillna(False).astype(bool)
+            invalid |= mask
+            for row in rows[mask].tolist():
+                self.row_errors[row].append(str(message))
+
+        valid = pd.DataFrame(
+            {
+                "row": rows,
+                "title": texts["Quiz Title"],
+                "description": description,
+                "frequency": frequency,
+                "question": texts["Question Text"],
+                "answer": texts["Answer Text"],
+                "is_correct": is_correct.isin(TRUE_VALUES),
+            }
+        )[~invalid]
+
+        for row, title, quiz_description, quiz_frequency, question, answer, correct in valid.itertuples(index=False):
+            quiz = self.quizzes.setdefault(
+                title,
+                {
+                    "row": int(row),
+                    "description": None if pd.isna(quiz_description) else quiz_description,
+                    "frequency": int(quiz_frequency),
+                    "questions": {},
+                },
+            )
+            answers = quiz["questions"].setdefault(question, {"row": int(row), "answers": []})["answers"]
+            answers.append((answer, bool(correct)))
+
+    def validate(self) -> list[dict]:
+        """
+        Method to check the structure of every collected quiz and return the errors of the whole file by row.
+        """
+        row_errors = defaultdict(list, {row: list(errors) for row, errors in self.row_errors.items()})
+
+        if not self.quizzes and not row_errors:
+            row_errors[FIRST_DATA_ROW].append(str(_("Import file does not contain any quiz.")))
+
+        for quiz in self.quizzes.values():
+            if len(quiz["questions"]) < 2:
+                row_errors[quiz["row"]].append(str(_("Each quiz must have at least two questions.")))
+
+            for question in quiz["questions"].values():
+                answers = question["answers"]
+                if len(answers) < 2:
+                    row_errors[question["row"]].append(str(_("Each question must have at least two answers.")))
+                if sum(correct for _answer, correct in answers) != 1:
+                    row_errors[question["row"]].append(str(_("Each question must have one correct answer.")))
+
+        return [{"row": row, "errors": errors} for row, errors in sorted(row_errors.items())]
+
+    def save(self) -> dict[str, list[int] | int]:
+        """
+        Method to persist every collected quiz with bulk queries.
+        It must be called only when validate() found no errors.
+        """
+        with transaction.atomic():
+            existing_quizzes = {}
+            for quiz in Quiz.objects.filter(company=self.company, title__in=self.quizzes.keys()).order_by("id"):
+                existing_quizzes.setdefault(quiz.title, quiz)
+
+            quizzes_to_update = []
+            quizzes_to_create = []
+            rescheduled_quizzes = []
+            for title, data in self.quizzes.items():
+                quiz = existing_quizzes.get(title)
+                if quiz:
+                    if quiz.frequency != data["frequency"]:
+                        rescheduled_quizzes.append(quiz)
+                    quiz.description = data["description"]
+                    quiz.frequency = data["frequency"]
+                    quiz.updated_at = now()
+                    quizzes_to_update.append(quiz)
+                else:
+                    quizzes_to_create.append(
+                        Quiz(
+                            title=title,
+                            description=data["description"],
+                            frequency=data["frequency"],
+                            company=self.company,
+                        )
+                    )
+
+            Quiz.objects.bulk_update(quizzes_to_update, ["description", "frequency", "updated_at"])
+            Question.objects.filter(quiz__in=quizzes_to_update).delete()
+            created_quizzes = Quiz.objects.bulk_create(quizzes_to_create, batch_size=BULK_BATCH_SIZE)
+
+            quizzes = quizzes_to_update + created_quizzes
+            questions = [
+                Question(quiz=quiz, text=text) for quiz in quizzes for text in self.quizzes[quiz.title]["questions"]
+            ]
+            questions = Question.objects.bulk_create(questions, batch_size=BULK_BATCH_SIZE)
+
+            answers = [
+                Answer(question=question, text=text, is_correct=is_correct)
+                for question in questions
+                for text, is_correct in self.quizzes[question.quiz.title]["questions"][question.text]["answers"]
+            ]
+            Answer.objects.bulk_create(answers, batch_size=BULK_BATCH_SIZE)
+
+            for quiz in quizzes_to_update:
+                bump_quiz_content_version(quiz.id)
+            reschedule_quiz_reminders(rescheduled_quizzes)
+            # bulk_create does not send post_save, members are notified about the new quizzes here
+            for quiz in created_quizzes:
+                post_save.send(sender=Quiz, instance=quiz, created=True, raw=False, using="default", update_fields=None)
+
+        return {
+            "created": [quiz.id for quiz in created_quizzes],
+            "updated": [quiz.id for quiz in quizzes_to_update],
+            "questions": len(questions),
+            "answers": len(answers),
+        }
+
+
+def iter_excel_frames(file, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[tuple[pd.DataFrame, float | None]]:
+    """
+    Function to read the first sheet of a workbook row by row in read-only mode and yield it in frames,
+    so the whole sheet is never loaded in memory.
+    Every frame comes with the part of the sheet read so far, from the sheet dimension when it is stored.
+    """
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+
+    try:
+        worksheet = workbook.worksheets[0]
+        data_rows = worksheet.max_row - 1 if worksheet.max_row else None
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        columns = ["" if column is None else str(column) for column in header]
+        position = 0
+        for batch in batched(rows, chunk_size):
+            # read-only rows are not padded, trailing empty cells may be missing
+            records = [row[: len(columns)] + (None,) * (len(columns) - len(row)) for row in batch]
+            frame = pd.DataFrame.from_records(
+                records, columns=columns, index=pd.RangeIndex(position, position + len(records))
+            )
+            position += len(records)
+            yield frame, min(1.0, position / data_rows) if data_rows else None
+    finally:
+        workbook.close()
+
+
+def _file_size(file) -> int | None:
+    try:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return size
+
+
+def iter_csv_frames(file, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[tuple[pd.DataFrame, float | None]]:
+    """
+    Function to read a CSV file in frames of chunk_size rows.
+    Every frame comes with the part of the file read so far, from the bytes read and the file size.
+    """
+    size = _file_size(file)
+
+    # blank lines are kept, so the frame index matches the line of the file
+    for frame in pd.read_csv(file, dtype=str, chunksize=chunk_size, skip_blank_lines=False):
+        yield frame, min(1.0, file.tell() / size) if size else None
+
+
+def iter_import_frames(file, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[tuple[pd.DataFrame, float | None]]:
+    extension = os.path.splitext(file.name or "")[1].lower()
+
+    if extension in CSV_EXTENSIONS:
+        return iter_csv_frames(file, chunk_size)
+    if extension in EXCEL_EXTENSIONS:
+        return iter_excel_frames(file, chunk_size)
+
+    raise serializers.ValidationError(
+        {"detail": _("Unsupported file type. Upload one of: ") + ", ".join(sorted(EXCEL_EXTENSIONS | CSV_EXTENSIONS))}
+    )
+
+
+def load_quiz_import(
+    company: Company,
+    file,
+    on_progress: Callable[[int, int], None] | None = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> QuizImport:
+    """
+    Function to read an uploaded quiz workbook or CSV file chunk by chunk and collect its rows for the given company.
+    on_progress is called after every chunk with the number of rows read and the estimated number of rows
+    of the file, extrapolated from the part of the file read so far (0 when it can't be estimated).
+    """
+    quiz_import = QuizImport(company)
+    frames = iter_import_frames(file, chunk_size)
+
+    try:
+        for frame, read in frames:
+            quiz_import.add_frame(frame)
+            if on_progress:
+                rows_count = quiz_import.rows_count
+                on_progress(rows_count, round(rows_count / read) if read else 0)
+    except serializers.ValidationError:
+        raise
+    except Exception as e:
+        raise serializers.ValidationError({"detail": f"Error reading file: {str(e)}"}) from e
+
+    return quiz_import
@@ -0,0 +1,85 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend.apps.company.models import Company
+from backend.apps.quiz.models import Quiz, Result
+from backend.apps.quiz.utils import calculate_average_quiz_scores
+from backend.apps.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic completed results inside a rolled back transaction and measure the time and peak "
+        "Python memory of the average scores aggregation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--results", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--quizzes", type=int, default=100)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--page-size", type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options)
+
+            for bucket in [None, "day", "month"]:
+                self._measure(bucket, options["page_size"])
+
+            transaction.set_rollback(True)
+
+    def _seed(self, options):
+        started = time.perf_counter()
+
+        owner = CustomUser.objects.create(username="benchmark_owner")
+        company = Company.objects.create(name="Benchmark Company", owner=owner)
+        users = CustomUser.objects.bulk_create(
+            [CustomUser(username=f"benchmark_user_{index}") for index in range(options["users"])]
+        )
+        quizzes = Quiz.objects.bulk_create(
+            [Quiz(title=f"Benchmark Quiz {index}", frequency=1, company=company) for index in range(options["quizzes"])]
+        )
+
+        batch = []
+        for index in range(options["results"]):
+            batch.append(
+                Result(
+                    user=users[index % len(users)],
+                    company=company,
+                    quiz=quizzes[index % len(quizzes)],
+                    score=index % 11,
+                    total_question=10,
+                    status=Result.QuizStatus.COMPLETED,
+                )
+            )
+            if len(batch) >= options["batch_size"]:
+                Result.objects.bulk_create(batch)
+                batch = []
+
+        if batch:
+            Result.objects.bulk_create(batch)
+
+        self.stdout.write(f"Seeded {options['results']} results in {time.perf_counter() - started:.2f}s")
+
+    def _measure(self, bucket, page_size):
+        results = Result.objects.completed()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+
+        averages = calculate_average_quiz_scores(results, bucket)
+        groups = averages.count()
+        page = list(averages[:page_size])
+
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"bucket={bucket or '-'}: {groups} groups, first page of {len(page)} in {elapsed:.2f}s, "
+            f"peak Python memory {peak / 1024:.1f} KiB"
+        )
@@ -0,0 +1,80 @@
+import time
+import tracemalloc
+from io import BytesIO
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from backend.apps.company.models import Company
+from backend.apps.quiz.importers import REQUIRED_COLUMNS, load_quiz_import
+from backend.apps.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a synthetic quiz workbook and measure streaming parsing, validation and saving of the quiz import "
+        "inside a rolled back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--answers", type=int, default=4, help="Answers per question.")
+        parser.add_argument("--questions", type=int, default=25, help="Questions per quiz.")
+
+    def handle(self, *args, **options):
+        workbook = self._build_workbook(options["rows"], options["answers"], options["questions"])
+
+        with transaction.atomic():
+            owner = CustomUser.objects.create(username="benchmark_importer")
+            company = Company.objects.create(name="Benchmark Import Company", owner=owner)
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            quiz_import = load_quiz_import(company, workbook)
+            parsed = time.perf_counter()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            errors = quiz_import.validate()
+            validated = time.perf_counter()
+
+            with CaptureQueriesContext(connection) as queries:
+                report = quiz_import.save()
+            saved = time.perf_counter()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"Rows: {quiz_import.rows_count}, errors: {len(errors)}")
+        self.stdout.write(
+            f"Quizzes: {len(report['created'])}, questions: {report['questions']}, answers: {report['answers']}"
+        )
+        self.stdout.write(
+            f"Parse {parsed - started:.2f}s (peak Python memory {peak / 1024 / 1024:.1f} MiB), "
+            f"validate {validated - parsed:.2f}s, "
+            f"save {saved - validated:.2f}s in {len(queries)} queries"
+        )
+
+    @staticmethod
+    def _build_workbook(rows_count, answers_count, questions_count):
+        rows = []
+        for index in range(rows_count):
+            question_index = index // answers_count
+            quiz_index = question_index // questions_count
+            rows.append(
+                [
+                    f"Benchmark Quiz {quiz_index}",
+                    "Synthetic quiz",
+                    7,
+                    f"Question {question_index}",
+                    f"Answer {index % answers_count}",
+                    index % answers_count == 0,
+                ]
+            )
+
+        workbook = BytesIO()
+        pd.DataFrame(rows, columns=REQUIRED_COLUMNS).to_excel(workbook, index=False)
+        workbook.seek(0)
+        workbook.name = "benchmark.xlsx"
+        return workbook
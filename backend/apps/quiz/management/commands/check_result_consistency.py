@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+
+from backend.apps.quiz.aggregates import rebuild_company_score_aggregates
+from backend.apps.quiz.models import Quiz, Result
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the denormalized company of every result is the company of its quiz, "
+        "--fix also recomputes the per company score aggregates of the affected users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Set the company of the inconsistent results.")
+
+    def handle(self, *args, **options):
+        inconsistent = Result.objects.exclude(company_id=F("quiz__company_id"))
+        count = inconsistent.count()
+
+        if not count:
+            self.stdout.write(self.style.SUCCESS("Every result belongs to the company of its quiz."))
+            return
+
+        if not options["fix"]:
+            raise CommandError(f"{count} results do not belong to the company of their quiz, run with --fix.")
+
+        moves = set(inconsistent.values_list("user_id", "company_id", "quiz__company_id"))
+        quiz_company = Quiz.objects.filter(id=OuterRef("quiz_id")).values("company_id")
+
+        with transaction.atomic():
+            fixed = Result.objects.filter(id__in=inconsistent.values("id")).update(company_id=Subquery(quiz_company))
+            # the per company scores of the users are recomputed for the companies the results left and joined
+            user_ids = {user_id for user_id, _company_id, _quiz_company_id in moves}
+            company_ids = {company_id for _user_id, company_id, _quiz_company_id in moves}
+            company_ids |= {quiz_company_id for _user_id, _company_id, quiz_company_id in moves}
+            rebuild_company_score_aggregates(user_ids, company_ids)
+        self.stdout.write(self.style.SUCCESS(f"Fixed the company of {fixed} results."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend.apps.quiz.models import QuizReminderSchedule
+from backend.apps.quiz.reminders import create_reminder_schedules, get_membership_reminders
+
+
+class Command(BaseCommand):
+    help = "Rebuild the next due reminder of every quiz for every company member from completed results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            QuizReminderSchedule.objects.all().delete()
+            count = create_reminder_schedules(get_membership_reminders(), options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} quiz reminder schedules."))
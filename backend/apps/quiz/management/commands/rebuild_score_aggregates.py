@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from backend.apps.quiz.aggregates import score_totals
+from backend.apps.quiz.models import Result, UserCompanyScoreAggregate, UserScoreAggregate
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per user and per user+company score aggregates from completed results."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        totals = score_totals()
+        completed_results = Result.objects.completed().order_by()
+
+        with transaction.atomic():
+            UserScoreAggregate.objects.all().delete()
+            UserCompanyScoreAggregate.objects.all().delete()
+
+            user_rows = completed_results.values("user_id").annotate(**totals).iterator(chunk_size=batch_size)
+            users_count = self._bulk_create(UserScoreAggregate, user_rows, batch_size)
+
+            company_rows = (
+                completed_results.values("user_id", "company_id").annotate(**totals).iterator(chunk_size=batch_size)
+            )
+            companies_count = self._bulk_create(UserCompanyScoreAggregate, company_rows, batch_size)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {users_count} user and {companies_count} user+company score aggregates.")
+        )
+
+    @staticmethod
+    def _bulk_create(model, rows, batch_size):
+        count = 0
+        batch = []
+
+        for row in rows:
+            batch.append(model(**row))
+            if len(batch) >= batch_size:
+                model.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+
+        if batch:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+
+        return count
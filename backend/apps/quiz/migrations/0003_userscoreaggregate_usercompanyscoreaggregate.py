@@ -0,0 +1,76 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def create_score_aggregates(apps, schema_editor):
+    """
+    Function to aggregate the completed results per user and per user and company.
+    """
+    Result = apps.get_model("quiz", "Result")
+    UserScoreAggregate = apps.get_model("quiz", "UserScoreAggregate")
+    UserCompanyScoreAggregate = apps.get_model("quiz", "UserCompanyScoreAggregate")
+    totals = {
+        "total_correct": Sum("score"),
+        "total_questions": Sum("total_question"),
+        "completions": Count("id"),
+        "last_completed_at": Max("updated_at"),
+    }
+    results = Result.objects.filter(status="Completed").order_by()
+
+    UserScoreAggregate.objects.bulk_create(
+        (UserScoreAggregate(**row) for row in results.values("user_id").annotate(**totals)),
+        batch_size=2000,
+    )
+    UserCompanyScoreAggregate.objects.bulk_create(
+        (UserCompanyScoreAggregate(**row) for row in results.values("user_id", "company_id").annotate(**totals)),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0006_alter_companyinvitation_unique_together'),
+        ('quiz', '0002_result'),
+        ('users', '0004_userrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserScoreAggregate',
+            fields=[
+                ('total_correct', models.PositiveIntegerField(default=0)),
+                ('total_questions', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score_aggregate', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Score Aggregate',
+                'verbose_name_plural': 'User Score Aggregates',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserCompanyScoreAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_correct', models.PositiveIntegerField(default=0)),
+                ('total_questions', models.PositiveIntegerField(default=0)),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_aggregates', to='company.company')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='company_score_aggregates', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Company Score Aggregate',
+                'verbose_name_plural': 'User Company Score Aggregates',
+                'unique_together': {('user', 'company')},
+            },
+        ),
+        migrations.RunPython(create_score_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from backend.apps.quiz.reminders import Days
+from backend.apps.shared.utils import batched
+
+
+def create_reminder_schedules(apps, schema_editor):
+    """
+    Function to schedule the next reminder of every quiz for every company member, like
+    rebuild_quiz_reminder_schedules: `frequency` days after the last completed result, or right away.
+    """
+    Company = apps.get_model("company", "Company")
+    Result = apps.get_model("quiz", "Result")
+    QuizReminderSchedule = apps.get_model("quiz", "QuizReminderSchedule")
+    last_completed_at = Subquery(
+        Result.objects.filter(user_id=OuterRef("user"), quiz_id=OuterRef("quiz"), status="Completed")
+        .order_by()
+        .values("user_id")
+        .annotate(last=Max("updated_at"))
+        .values("last")
+    )
+    reminders = (
+        Company.members.through.objects.annotate(
+            user=F("customuser_id"),
+            quiz=F("company__quizzes__id"),
+            frequency=F("company__quizzes__frequency"),
+        )
+        .filter(quiz__isnull=False)
+        .annotate(next_due=Coalesce(last_completed_at + Days("frequency"), Value(now())))
+        .order_by()
+        .values_list("user", "quiz", "next_due")
+    )
+
+    for batch in batched(reminders.iterator(chunk_size=2000), 2000):
+        QuizReminderSchedule.objects.bulk_create(
+            [QuizReminderSchedule(user_id=user, quiz_id=quiz, next_due=next_due) for user, quiz, next_due in batch]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0006_alter_companyinvitation_unique_together'),
+        ('quiz', '0005_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizReminderSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_due', models.DateTimeField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_schedules', to='quiz.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_reminder_schedules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Quiz Reminder Schedule',
+                'verbose_name_plural': 'Quiz Reminder Schedules',
+                'indexes': [models.Index(fields=['next_due', 'id'], name='quiz_quizre_next_du_24602e_idx')],
+                'unique_together': {('user', 'quiz')},
+            },
+        ),
+        migrations.RunPython(create_reminder_schedules, migrations.RunPython.noop),
+    ]
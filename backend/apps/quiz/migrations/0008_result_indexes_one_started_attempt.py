@@ -0,0 +1,57 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:14
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def delete_duplicate_started_results(apps, schema_editor):
+    """
+    Function to keep only the latest started attempt of every user and quiz before the constraint is added.
+    """
+    Result = apps.get_model("quiz", "Result")
+    started = Result.objects.filter(status="Started")
+    duplicates = (
+        started.order_by()
+        .values("user_id", "quiz_id")
+        .annotate(latest_id=Max("id"), attempts=Count("id"))
+        .filter(attempts__gt=1)
+    )
+
+    for duplicate in duplicates:
+        started.filter(user_id=duplicate["user_id"], quiz_id=duplicate["quiz_id"]).exclude(
+            id=duplicate["latest_id"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0007_company_created_at_id_index'),
+        ('quiz', '0007_quiz_result_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['user', 'quiz', 'status', 'updated_at'], name='quiz_result_user_quiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('status', 'Completed')), fields=['user', 'updated_at'], name='quiz_result_user_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('status', 'Completed')), fields=['quiz', 'updated_at'], name='quiz_result_quiz_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(condition=models.Q(('status', 'Completed')), fields=['company', 'updated_at'], name='quiz_result_comp_completed_idx'),
+        ),
+        migrations.RunPython(delete_duplicate_started_results, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='result',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'Started')), fields=('user', 'quiz'), name='quiz_result_one_started_attempt'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.2 on 2026-10-18 15:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_latest_attempts(apps, schema_editor):
+    """
+    Function to point every user and quiz at their last completed result.
+    """
+    Result = apps.get_model("quiz", "Result")
+    LatestQuizAttempt = apps.get_model("quiz", "LatestQuizAttempt")
+    results = (
+        Result.objects.filter(status="Completed")
+        .order_by("user_id", "quiz_id", "-updated_at", "-id")
+        .values_list("id", "user_id", "quiz_id", "updated_at")
+    )
+
+    attempts = []
+    last_pair = None
+    for result_id, user_id, quiz_id, updated_at in results.iterator(chunk_size=2000):
+        if (user_id, quiz_id) == last_pair:
+            continue
+        last_pair = (user_id, quiz_id)
+        attempts.append(
+            LatestQuizAttempt(user_id=user_id, quiz_id=quiz_id, result_id=result_id, completed_at=updated_at)
+        )
+
+    LatestQuizAttempt.objects.bulk_create(attempts, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0008_result_indexes_one_started_attempt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestQuizAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_at', models.DateTimeField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latest_attempts', to='quiz.quiz')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='quiz.result')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='latest_quiz_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Latest Quiz Attempt',
+                'verbose_name_plural': 'Latest Quiz Attempts',
+                'unique_together': {('user', 'quiz')},
+            },
+        ),
+        migrations.RunPython(create_latest_attempts, migrations.RunPython.noop),
+    ]
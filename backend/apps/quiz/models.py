@@ -1,7 +1,7 @@
 from django.db import models
 
 from backend.apps.company.models import Company
-from backend.apps.shared.models import TimeStamp
+from backend.apps.shared.models import BackgroundJob, TimeStamp
 from backend.apps.users.models import CustomUser
 
 
@@ -15,6 +15,7 @@ class Quiz(TimeStamp):
     class Meta:
         verbose_name = "Quiz"
         verbose_name_plural = "Quizzes"
+        indexes = [models.Index(fields=["created_at", "id"])]
 
     def __str__(self):
         return self.title
@@ -43,6 +44,28 @@ class Answer(models.Model):
         return self.text
 
 
+class ResultQuerySet(models.QuerySet):
+    """
+    Result queries filter on the columns of the result itself, company included,
+    so they are answered from the result indexes without joining the quiz.
+    """
+
+    def completed(self):
+        return self.filter(status=Result.QuizStatus.COMPLETED)
+
+    def started(self):
+        return self.filter(status=Result.QuizStatus.STARTED)
+
+    def for_company(self, company):
+        return self.filter(company=company)
+
+    def for_user(self, user):
+        return self.filter(user=user)
+
+    def for_quiz(self, quiz):
+        return self.filter(quiz=quiz)
+
+
 class Result(TimeStamp):
     class QuizStatus(models.TextChoices):
         STARTED = "Started"
@@ -54,7 +77,120 @@ class Result(TimeStamp):
     score = models.PositiveIntegerField(default=0)
     total_question = models.PositiveIntegerField()
     status = models.CharField(max_length=10, choices=QuizStatus.choices, default=QuizStatus.STARTED)
+    # Idempotency-Key header of the request that completed the result, a retry with the same key is a no-op
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+
+    objects = ResultQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Test Result"
         verbose_name_plural = "Test Results"
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["user", "quiz", "status", "updated_at"], name="quiz_result_user_quiz_idx"),
+            models.Index(
+                fields=["user", "updated_at"],
+                name="quiz_result_user_completed_idx",
+                condition=models.Q(status="Completed"),
+            ),
+            models.Index(
+                fields=["quiz", "updated_at"],
+                name="quiz_result_quiz_completed_idx",
+                condition=models.Q(status="Completed"),
+            ),
+            models.Index(
+                fields=["company", "updated_at"],
+                name="quiz_result_comp_completed_idx",
+                condition=models.Q(status="Completed"),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "quiz"],
+                name="quiz_result_one_started_attempt",
+                condition=models.Q(status="Started"),
+            ),
+            models.UniqueConstraint(fields=["user", "idempotency_key"], name="quiz_result_user_idempotency_key"),
+        ]
+
+
+class ScoreAggregate(models.Model):
+    total_correct = models.PositiveIntegerField(default=0)
+    total_questions = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+
+class UserScoreAggregate(ScoreAggregate):
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="score_aggregate")
+
+    class Meta:
+        verbose_name = "User Score Aggregate"
+        verbose_name_plural = "User Score Aggregates"
+
+
+class UserCompanyScoreAggregate(ScoreAggregate):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="company_score_aggregates")
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="score_aggregates")
+
+    class Meta:
+        verbose_name = "User Company Score Aggregate"
+        verbose_name_plural = "User Company Score Aggregates"
+        unique_together = ("user", "company")
+
+
+class LatestQuizAttempt(models.Model):
+    """
+    Pointer to the last completed result of a user for a quiz, kept up to date on completion,
+    so the last completion is read from one row instead of aggregating the results.
+    """
+
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="latest_quiz_attempts")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="latest_attempts")
+    result = models.ForeignKey(Result, on_delete=models.CASCADE, related_name="+")
+    completed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Latest Quiz Attempt"
+        verbose_name_plural = "Latest Quiz Attempts"
+        unique_together = ("user", "quiz")
+
+
+class QuizReminderSchedule(models.Model):
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="quiz_reminder_schedules")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="reminder_schedules")
+    next_due = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Quiz Reminder Schedule"
+        verbose_name_plural = "Quiz Reminder Schedules"
+        unique_together = ("user", "quiz")
+        indexes = [models.Index(fields=["next_due", "id"])]
+
+
+class ExportJob(BackgroundJob):
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="export_jobs")
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, null=True, blank=True, related_name="export_jobs")
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name="export_jobs")
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    file_format = models.CharField(max_length=20)
+    file = models.FileField(upload_to="exports/", blank=True)
+
+    class Meta:
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+
+
+class ImportJob(BackgroundJob):
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="import_jobs")
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="import_jobs")
+    file = models.FileField(upload_to="imports/")
+    errors = models.JSONField(default=list, blank=True)
+    report = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Import Job"
+        verbose_name_plural = "Import Jobs"
@@ -1,7 +1,23 @@
 from rest_framework import pagination
 
+from backend.apps.shared.pagination import PageNumberOrKeysetPagination
+
+
+class QuizPagination(PageNumberOrKeysetPagination):
+    page_size = 10
+
+
+class AverageScorePagination(pagination.PageNumberPagination):
+    """
+    Page number pagination for the grouped average scores, a keyset ordering on (created_at, id)
+    would be added to their GROUP BY and split the groups.
+    """
 
-class QuizPagination(pagination.PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class ResultPagination(PageNumberOrKeysetPagination):
+    page_size = 20
+    ordering = ("-created_at", "-id")
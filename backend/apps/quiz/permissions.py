@@ -1,26 +1,22 @@
 from rest_framework.permissions import BasePermission
 
-from backend.apps.company.models import Company
+from backend.apps.company.roles import CompanyRole, has_company_role
 
 
 class IsOwnerOrAdmin(BasePermission):
     def has_permission(self, request, view):
         if view.action == "create":
             company_id = request.data.get("company")
-            if not company_id:
-                return False
-            company = Company.objects.filter(id=company_id).first()
-            if not company:
-                return False
-            return company.owner == request.user or request.user in company.admins.all()
+            return has_company_role(request, company_id, CompanyRole.OWNER, CompanyRole.ADMIN)
+        if view.action == "import_quiz" and "company" in request.query_params:
+            company_id = request.query_params["company"]
+            return has_company_role(request, company_id, CompanyRole.OWNER, CompanyRole.ADMIN)
         return True
 
     def has_object_permission(self, request, view, obj):
-        company = obj.company
-        user = request.user
-        return user == company.owner or user in company.admins.all()
+        return has_company_role(request, obj.company_id, CompanyRole.OWNER, CompanyRole.ADMIN)
 
 
 class IsCompanyMember(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.user in obj.company.members.all()
+        return has_company_role(request, obj.company_id, CompanyRole.MEMBER)
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+
+from django.db.models import DurationField, F, Func, OuterRef, QuerySet, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from backend.apps.company.models import Company
+from backend.apps.quiz.models import LatestQuizAttempt, Quiz, QuizReminderSchedule
+from backend.apps.shared.utils import batched
+from backend.apps.users.models import CustomUser
+
+REMINDER_CHUNK_SIZE = 1000
+
+Membership = Company.members.through
+
+
+class Days(Func):
+    """
+    Interval of the given number of days.
+    """
+
+    function = "make_interval"
+    template = "%(function)s(days => %(expressions)s)"
+    output_field = DurationField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # SQLite stores durations as microseconds
+        return self.as_sql(compiler, connection, template="(%(expressions)s * 86400000000)", **extra_context)
+
+
+def _last_completed_at(user: OuterRef | int, quiz: OuterRef | int) -> Subquery:
+    return Subquery(LatestQuizAttempt.objects.filter(user_id=user, quiz_id=quiz).values("completed_at"))
+
+
+def get_membership_reminders(moment: datetime | None = None) -> QuerySet:
+    """
+    Function to build the query for the (user, quiz, next_due) rows of every quiz of every company member.
+    The reminder is due `frequency` days after the last completed result of the quiz, or right away without one.
+    It can be narrowed with the user and quiz annotations or the company_id of the membership.
+    """
+    moment = moment or now()
+
+    return (
+        Membership.objects.annotate(
+            user=F("customuser_id"),
+            quiz=F("company__quizzes__id"),
+            frequency=F("company__quizzes__frequency"),
+        )
+        .filter(quiz__isnull=False)
+        .annotate(
+            next_due=Coalesce(_last_completed_at(OuterRef("user"), OuterRef("quiz")) + Days("frequency"), Value(moment))
+        )
+        .order_by()
+        .values_list("user", "quiz", "next_due")
+    )
+
+
+def create_reminder_schedules(reminders: QuerySet, batch_size: int = REMINDER_CHUNK_SIZE) -> int:
+    """
+    Function to store the schedules of the given membership reminders, keeping the ones that already exist.
+    """
+    count = 0
+
+    for batch in batched(reminders.iterator(chunk_size=batch_size), batch_size):
+        QuizReminderSchedule.objects.bulk_create(
+            [QuizReminderSchedule(user_id=user, quiz_id=quiz, next_due=next_due) for user, quiz, next_due in batch],
+            ignore_conflicts=True,
+        )
+        count += len(batch)
+
+    return count
+
+
+def reschedule_quiz_reminders(quizzes: Iterable[Quiz]) -> None:
+    """
+    Function to recompute the next due date of every schedule of the quizzes, after their frequency changed.
+    """
+    moment = now()
+
+    for quiz in quizzes:
+        QuizReminderSchedule.objects.filter(quiz=quiz).update(
+            next_due=Coalesce(
+                _last_completed_at(OuterRef("user_id"), quiz.id) + Value(timedelta(days=quiz.frequency)), Value(moment)
+            )
+        )
+
+
+def reschedule_reminder(user_id: int, quiz: Quiz, completed_at: datetime) -> None:
+    """
+    Function to move the next reminder of a completed quiz `frequency` days after its completion.
+    """
+    QuizReminderSchedule.objects.filter(user_id=user_id, quiz=quiz).update(
+        next_due=completed_at + timedelta(days=quiz.frequency)
+    )
+
+
+def iter_due_reminder_user_chunks(
+    chunk_size: int = REMINDER_CHUNK_SIZE, moment: datetime | None = None
+) -> Iterator[list[int]]:
+    """
+    Function to read the ids of the users with due reminders in chunks.
+    Due rows are found with the next_due index and streamed from one query, so every user is listed once
+    and all their due quizzes can be sent in one email.
+    """
+    due_users = (
+        QuizReminderSchedule.objects.filter(next_due__lte=moment or now())
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+    yield from batched(due_users.iterator(chunk_size=chunk_size), chunk_size)
+
+
+def get_due_reminders_by_user(user_ids: list[int], moment: datetime) -> dict[CustomUser, list[Quiz]]:
+    """
+    Function to load the due quizzes of the given users, grouped by user.
+    """
+    schedules = (
+        QuizReminderSchedule.objects.filter(user_id__in=user_ids, next_due__lte=moment)
+        .select_related("user", "quiz")
+        .order_by("user_id", "quiz_id")
+    )
+    reminders = defaultdict(list)
+
+    for schedule in schedules:
+        reminders[schedule.user].append(schedule.quiz)
+
+    return reminders
@@ -2,7 +2,10 @@ from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
-from backend.apps.quiz.models import Answer, Question, Quiz, Result
+from backend.apps.quiz.aggregates import rebuild_company_score_aggregates
+from backend.apps.quiz.cache import bump_quiz_content_version
+from backend.apps.quiz.models import Answer, ExportJob, ImportJob, Question, Quiz, Result
+from backend.apps.quiz.reminders import create_reminder_schedules, get_membership_reminders, reschedule_quiz_reminders
 
 
 class AnswerSerializer(serializers.ModelSerializer):
@@ -66,6 +69,7 @@ class QuizSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def update(self, instance, validated_data):
+        previous_frequency, previous_company_id = instance.frequency, instance.company_id
         instance.title = validated_data.get("title", instance.title)
         instance.frequency = validated_data.get("frequency", instance.frequency)
         instance.company = validated_data.get("company", instance.company)
@@ -103,6 +107,19 @@ class QuizSerializer(serializers.ModelSerializer):
             instance.questions.filter(id__in=question_ids_to_delete).delete()
 
         instance.save()
+        bump_quiz_content_version(instance.id)
+
+        if instance.company_id != previous_company_id:
+            # the results follow their quiz, the per company scores of its users are recomputed for both companies
+            instance.results.update(company_id=instance.company_id)
+            rebuild_company_score_aggregates(
+                instance.results.values("user_id"), [previous_company_id, instance.company_id]
+            )
+            instance.reminder_schedules.all().delete()
+            create_reminder_schedules(get_membership_reminders().filter(quiz=instance.id))
+        elif instance.frequency != previous_frequency:
+            reschedule_quiz_reminders([instance])
+
         return instance
 
 
@@ -112,27 +129,43 @@ class ResultSerializer(serializers.ModelSerializer):
         fields = ["id", "score", "total_question", "status", "created_at", "updated_at"]
 
 
-class ResultExportSerializer(serializers.ModelSerializer):
-    user = serializers.SerializerMethodField()
-    company = serializers.SerializerMethodField()
-    quiz = serializers.SerializerMethodField()
-    date_passed = serializers.SerializerMethodField()
-
+class ExportJobSerializer(serializers.ModelSerializer):
     class Meta:
-        model = Result
-        fields = ["id", "user", "company", "quiz", "score", "date_passed"]
-
-    def get_date_passed(self, obj):
-        return obj.updated_at.strftime("%Y-%m-%d %H:%M:%S")
-
-    def get_user(self, obj):
-        return obj.user.username
-
-    def get_company(self, obj):
-        return obj.company.name
-
-    def get_quiz(self, obj):
-        return obj.quiz.title
+        model = ExportJob
+        fields = [
+            "id",
+            "status",
+            "progress",
+            "processed_rows",
+            "total_rows",
+            "file_format",
+            "quiz",
+            "company",
+            "user",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "status",
+            "progress",
+            "processed_rows",
+            "total_rows",
+            "company",
+            "errors",
+            "report",
+            "error",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
 
 
 class QuizResultSerializer(serializers.Serializer):
@@ -153,5 +186,6 @@ class QuizResultSerializer(serializers.Serializer):
 class QuizAverageScoreSerializer(serializers.Serializer):
     quiz_id = serializers.IntegerField()
     title = serializers.CharField()
-    average_score = serializers.FloatField()
+    average_score = serializers.DecimalField(max_digits=4, decimal_places=2, coerce_to_string=False)
+    period = serializers.DateTimeField(required=False)
     timestamp = serializers.DateTimeField()
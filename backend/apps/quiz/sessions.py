@@ -0,0 +1,86 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.connection import ConnectionProxy
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+# saved answers can't be rebuilt from the database, they are kept in a Redis that never evicts keys
+session_cache = ConnectionProxy(caches, settings.QUIZ_SESSION_CACHE_ALIAS)
+
+SESSION_LOCK_TIMEOUT = 5
+SESSION_LOCK_WAIT = 0.01
+
+
+def _session_key(result_id: int) -> str:
+    return f"quiz_session:{result_id}"
+
+
+@contextmanager
+def _session_lock(result_id: int) -> Iterator[None]:
+    """
+    Lock on the session of an attempt, so parallel autosaves don't overwrite each other's answers.
+    session_cache.add only sets a missing key (SET NX on Redis), the lock expires by itself if its holder dies.
+    """
+    key = f"{_session_key(result_id)}:lock"
+
+    while not session_cache.add(key, True, timeout=SESSION_LOCK_TIMEOUT):
+        time.sleep(SESSION_LOCK_WAIT)
+
+    try:
+        yield
+    finally:
+        session_cache.delete(key)
+
+
+def get_session_answers(result_id: int) -> dict[int, int | None]:
+    """
+    Function to get the answers saved in the session of a started attempt, as question id -> answer id.
+    """
+    return session_cache.get(_session_key(result_id)) or {}
+
+
+def save_session_answers(result_id: int, user_answers: list[dict]) -> dict[int, int | None]:
+    """
+    Function to merge the submitted answers into the session of a started attempt.
+    The session lives in the session cache only, it expires QUIZ_SESSION_TIMEOUT seconds after the last save.
+    """
+    with _session_lock(result_id):
+        answers = get_session_answers(result_id)
+        answers.update({user_answer["question"]: user_answer.get("answer") for user_answer in user_answers})
+        session_cache.set(_session_key(result_id), answers, timeout=settings.QUIZ_SESSION_TIMEOUT)
+
+    return answers
+
+
+def merge_session_answers(
+    saved_answers: dict[int, int | None], user_answers: list[dict] | None, answer_key: dict[int, int | None]
+) -> list[dict]:
+    """
+    Function to combine the saved answers with the submitted ones, a submitted answer replaces the saved one.
+    Saved answers of questions removed from the quiz since they were saved are dropped.
+    """
+    if user_answers is None:
+        user_answers = []
+    if not isinstance(user_answers, list):
+        raise serializers.ValidationError({"answers": _("Answers must be a list.")})
+
+    submitted = {user_answer.get("question") for user_answer in user_answers if isinstance(user_answer, dict)}
+    saved = [
+        {"question": question, "answer": answer}
+        for question, answer in saved_answers.items()
+        if question not in submitted and question in answer_key
+    ]
+    return saved + user_answers
+
+
+def delete_session(result_id: int) -> None:
+    """
+    Function to drop the session of an attempt once its completion is committed.
+    """
+    transaction.on_commit(partial(session_cache.delete, _session_key(result_id)))
@@ -0,0 +1,41 @@
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from backend.apps.company.models import Company
+from backend.apps.quiz.models import Quiz, QuizReminderSchedule
+from backend.apps.quiz.reminders import create_reminder_schedules, get_membership_reminders
+
+
+@receiver(m2m_changed, sender=Company.members.through)
+def update_member_reminder_schedules(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the quiz reminder schedules of company members in sync with the membership.
+    With reverse=True the instance is the user and pk_set holds company ids.
+    """
+    if action == "post_add":
+        reminders = get_membership_reminders()
+        if reverse:
+            reminders = reminders.filter(user=instance.pk, company_id__in=pk_set)
+        else:
+            reminders = reminders.filter(company_id=instance.pk, user__in=pk_set)
+        create_reminder_schedules(reminders)
+
+    elif action == "post_remove":
+        if reverse:
+            schedules = QuizReminderSchedule.objects.filter(user=instance.pk, quiz__company__in=pk_set)
+        else:
+            schedules = QuizReminderSchedule.objects.filter(quiz__company=instance.pk, user__in=pk_set)
+        schedules.delete()
+
+    elif action == "pre_clear":
+        if reverse:
+            schedules = QuizReminderSchedule.objects.filter(user=instance.pk)
+        else:
+            schedules = QuizReminderSchedule.objects.filter(quiz__company=instance.pk)
+        schedules.delete()
+
+
+@receiver(post_save, sender=Quiz)
+def create_quiz_reminder_schedules(sender, instance, created, **kwargs):
+    if created:
+        create_reminder_schedules(get_membership_reminders().filter(quiz=instance.id))
@@ -1,32 +1,133 @@
+import logging
+import tempfile
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from uuid import uuid4
+
 from celery import shared_task
-from django.db.models import Prefetch
+from django.core.files import File
 from django.utils.timezone import now
+from rest_framework import serializers
+
+from backend.apps.notification.utils import notify_user
+from backend.apps.quiz.exports import EXPORT_FORMATS, get_results_export_queryset, iter_export_rows
+from backend.apps.quiz.importers import load_quiz_import
+from backend.apps.quiz.models import ExportJob, ImportJob
+from backend.apps.quiz.reminders import get_due_reminders_by_user, iter_due_reminder_user_chunks
+from backend.apps.shared.utils import send_quiz_reminder_emails, update_job_progress
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_STEP = 1000
+
+
+@shared_task
+def send_quiz_reminders() -> int:
+    """
+    Task to find the users with due reminders in chunks and send every chunk from its own subtask.
+    """
+    moment = now()
+    chunks = 0
+    users = 0
+
+    for user_ids in iter_due_reminder_user_chunks(moment=moment):
+        send_quiz_reminder_batch.delay(user_ids, moment.isoformat())
+        chunks += 1
+        users += len(user_ids)
 
-from backend.apps.quiz.models import Quiz, Result
-from backend.apps.shared.utils import send_email_quiz_notification
-from backend.apps.users.models import CustomUser
+    logger.info("Scheduled quiz reminders for %d users in %d batches", users, chunks)
+    return users
 
 
 @shared_task
-def notify_users():
-    users = CustomUser.objects.all().prefetch_related(
-        Prefetch("companies__quizzes", queryset=Quiz.objects.all(), to_attr="prefetched_quizzes"),
-        Prefetch(
-            "results", queryset=Result.objects.filter(status=Result.QuizStatus.COMPLETED), to_attr="prefetched_results"
-        ),
-    )
-
-    for user in users:
-        quizzes = getattr(user.company, "prefetched_quizzes", [])
-        user_results = {result.quiz.id: result for result in user.prefetched_results}
-
-        for quiz in quizzes:
-            last_attempt = user_results.get(quiz.id)
-
-            if last_attempt and last_attempt.status == Result.QuizStatus.COMPLETED:
-                time_since_last_attempt = (now() - last_attempt.updated_at).days
-            else:
-                time_since_last_attempt = float("inf")
-
-            if time_since_last_attempt >= quiz.frequency:
-                send_email_quiz_notification(user, quiz)
+def send_quiz_reminder_batch(user_ids: list[int], moment: str) -> int:
+    reminders = get_due_reminders_by_user(user_ids, datetime.fromisoformat(moment))
+    return send_quiz_reminder_emails(reminders)
+
+
+def _track_progress(job: ExportJob, rows: Iterable[dict]) -> Iterator[dict]:
+    processed_rows = 0
+
+    for row in rows:
+        yield row
+        processed_rows += 1
+        if processed_rows % PROGRESS_STEP == 0:
+            update_job_progress(job, processed_rows, job.total_rows)
+
+
+@shared_task
+def run_export_job(job_id: int) -> None:
+    job = ExportJob.objects.get(id=job_id)
+    export_format = EXPORT_FORMATS[job.file_format]
+
+    try:
+        results = get_results_export_queryset(quiz=job.quiz, user=job.user, company=job.company)
+        job.status = ExportJob.JobStatus.RUNNING
+        job.total_rows = results.count()
+        job.save(update_fields=["status", "total_rows", "updated_at"])
+
+        with tempfile.TemporaryFile() as export_file:
+            for chunk in export_format.stream(_track_progress(job, iter_export_rows(results))):
+                export_file.write(chunk)
+
+            job.file.save(f"{uuid4().hex}.{export_format.extension}", File(export_file), save=False)
+    except Exception as e:
+        logger.exception("Export job %d failed", job.id)
+        job.status = ExportJob.JobStatus.FAILED
+        job.error = str(e)
+        job.save(update_fields=["status", "error", "updated_at"])
+        notify_user(job.requested_by_id, f"Your export #{job.id} has failed.")
+        return
+
+    job.status = ExportJob.JobStatus.COMPLETED
+    job.processed_rows = job.total_rows
+    job.progress = 100
+    job.save(update_fields=["status", "processed_rows", "progress", "file", "updated_at"])
+    notify_user(job.requested_by_id, f"Your export #{job.id} is ready to download.")
+
+
+def _fail_import_job(job: ImportJob, error: str, errors: list[dict] | None = None) -> None:
+    job.status = ImportJob.JobStatus.FAILED
+    job.error = error
+    job.errors = errors or []
+    job.save(update_fields=["status", "error", "errors", "updated_at"])
+    notify_user(job.requested_by_id, f"Your quiz import #{job.id} has failed.")
+
+
+@shared_task
+def run_import_job(job_id: int) -> None:
+    job = ImportJob.objects.select_related("company").get(id=job_id)
+
+    job.status = ImportJob.JobStatus.RUNNING
+    job.save(update_fields=["status", "updated_at"])
+
+    try:
+        with job.file.open("rb") as file:
+            quiz_import = load_quiz_import(
+                job.company, file, on_progress=lambda rows, total_rows: update_job_progress(job, rows, total_rows)
+            )
+
+        job.total_rows = quiz_import.rows_count
+        job.save(update_fields=["total_rows", "updated_at"])
+
+        errors = quiz_import.validate()
+        if errors:
+            _fail_import_job(job, "Import file contains invalid rows.", errors)
+            return
+
+        report = quiz_import.save()
+    except serializers.ValidationError as e:
+        detail = e.detail.get("detail", e.detail) if isinstance(e.detail, dict) else e.detail
+        _fail_import_job(job, str(detail))
+        return
+    except Exception as e:
+        logger.exception("Import job %d failed", job.id)
+        _fail_import_job(job, str(e))
+        return
+
+    job.status = ImportJob.JobStatus.COMPLETED
+    job.processed_rows = job.total_rows
+    job.progress = 100
+    job.report = report
+    job.save(update_fields=["status", "processed_rows", "progress", "report", "updated_at"])
+    notify_user(job.requested_by_id, f"Your quiz import #{job.id} has completed.")
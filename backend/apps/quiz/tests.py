@@ -1,13 +1,56 @@
+import gzip
+import json
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+import pandas as pd
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Max
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 
 from backend.apps.company.models import Company
-from backend.apps.quiz.models import Answer, Question, Quiz, Result
+from backend.apps.notification.models import Notification
+from backend.apps.notification.tasks import fan_out_quiz_notification
+from backend.apps.quiz.exports import get_results_export_queryset
+from backend.apps.quiz.importers import load_quiz_import
+from backend.apps.quiz.models import (
+    Answer,
+    ExportJob,
+    ImportJob,
+    LatestQuizAttempt,
+    Question,
+    Quiz,
+    QuizReminderSchedule,
+    Result,
+    UserCompanyScoreAggregate,
+    UserScoreAggregate,
+)
+from backend.apps.quiz.reminders import get_due_reminders_by_user, iter_due_reminder_user_chunks
+from backend.apps.quiz.utils import record_latest_attempt
+from backend.apps.quiz.sessions import get_session_answers, save_session_answers, session_cache
+from backend.apps.shared.utils import update_job_progress
+from backend.apps.quiz.tasks import run_export_job, run_import_job, send_quiz_reminder_batch, send_quiz_reminders
 from backend.apps.users.models import CustomUser
 
 
 class QuizTest(APITestCase):
     def setUp(self):
+        cache.clear()
+        session_cache.clear()
         self.owner = CustomUser.objects.create_user(
             username="testuser", password="testpassword", email="testuser@example.com"
         )
@@ -63,6 +106,32 @@ class QuizTest(APITestCase):
         self.quiz.refresh_from_db()
         self.assertEqual(self.quiz.title, "Updated Quiz")
     
+    def test_quiz_moved_to_another_company_takes_its_results_and_scores(self):
+        other_quiz = Quiz.objects.create(title="Other Quiz", frequency=0, company=self.company)
+        other_question = Question.objects.create(text="What is 3 + 3?", quiz=other_quiz)
+        other_answer = Answer.objects.create(text="6", is_correct=True, question=other_question)
+        self.client.force_authenticate(user=self.user)
+        for quiz, question, answer in [(self.quiz, self.question, self.answer), (other_quiz, other_question, other_answer)]:
+            self.client.post(f"/api/quiz/quizzes/{quiz.id}/start-quiz/", format="json")
+            self.client.post(
+                f"/api/quiz/quizzes/{quiz.id}/complete-quiz/",
+                data={"answers": [{"question": question.id, "answer": answer.id}]},
+                format="json",
+            )
+
+        new_company = Company.objects.create(name="New Company", owner=self.owner)
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.patch(f"/api/quiz/quizzes/{self.quiz.id}/", data={"company": new_company.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(Result.objects.for_quiz(self.quiz).get().company, new_company)
+        aggregates = UserCompanyScoreAggregate.objects.filter(user=self.user)
+        self.assertEqual(
+            {aggregate.company_id: aggregate.completions for aggregate in aggregates},
+            {self.company.id: 1, new_company.id: 1},
+        )
+        call_command("check_result_consistency", stdout=StringIO())
+
     def test_quiz_delete(self):
         response = self.client.delete(f"/api/quiz/quizzes/{self.quiz.id}/")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -82,6 +151,39 @@ class QuizTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     
+    def test_retrieve_quiz_is_cached_until_content_changes(self):
+        response = self.client.get(f"/api/quiz/quizzes/{self.quiz.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["questions"]), 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f"/api/quiz/quizzes/{self.quiz.id}/")
+        self.assertEqual(len(response.data["questions"]), 1)
+
+        question_data = {
+            "text": "What is 3 + 3?",
+            "answers": [{"text": "6", "is_correct": True}, {"text": "7", "is_correct": False}],
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/quiz/quizzes/{self.quiz.id}/add-question/", data=question_data, format="json")
+
+        response = self.client.get(f"/api/quiz/quizzes/{self.quiz.id}/")
+        self.assertEqual(len(response.data["questions"]), 2)
+
+    def test_retrieve_quiz_with_padded_id_shares_the_cached_content(self):
+        padded_url = f"/api/quiz/quizzes/0{self.quiz.id}/"
+        response = self.client.get(padded_url)
+        self.assertEqual(len(response.data["questions"]), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/quiz/quizzes/{self.quiz.id}/remove-question/", data={"question": self.question.id}, format="json"
+            )
+
+        response = self.client.get(padded_url)
+        self.assertEqual(response.data["questions"], [])
+        self.assertEqual(self.client.get("/api/quiz/quizzes/abc/").status_code, status.HTTP_404_NOT_FOUND)
+
     def test_remove_question(self):
         question_to_remove = {"question": self.question.id}
         response = self.client.patch(
@@ -103,6 +205,28 @@ class QuizTest(APITestCase):
         self.assertIsNotNone(result)
         self.assertEqual(result.status, Result.QuizStatus.STARTED)
     
+    def test_start_quiz_retries_when_the_started_attempt_is_completed_meanwhile(self):
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, total_question=1)
+        bulk_create = Result.objects.bulk_create
+        calls = []
+
+        def bulk_create_completed_meanwhile(*args, **kwargs):
+            created = bulk_create(*args, **kwargs)
+            if not calls:
+                # a parallel completion commits between the skipped insert and the read of the started attempt
+                Result.objects.started().for_user(self.user).update(status=Result.QuizStatus.COMPLETED)
+            calls.append(created)
+            return created
+
+        self.client.force_authenticate(user=self.user)
+        with mock.patch.object(Result.objects, "bulk_create", side_effect=bulk_create_completed_meanwhile):
+            response = self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Result.objects.completed().for_user(self.user).count(), 1)
+        self.assertEqual(Result.objects.started().for_user(self.user).get().id, response.data["id"])
+
     def test_complete_quiz(self):
         self.client.force_authenticate(user=self.user)
         self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
@@ -123,7 +247,260 @@ class QuizTest(APITestCase):
         self.assertEqual(result.status, Result.QuizStatus.COMPLETED)
         self.assertEqual(result.score, 1)
         self.assertEqual(result.total_question, 1)
-    
+
+    def test_retakes_keep_history_and_move_latest_attempt(self):
+        self.client.force_authenticate(user=self.user)
+        answers_data = [{"question": self.question.id, "answer": self.answer.id}]
+
+        for _attempt in range(2):
+            self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+            response = self.client.post(
+                f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/", data={"answers": answers_data}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = Result.objects.completed().for_user(self.user).for_quiz(self.quiz).order_by("id")
+        self.assertEqual(results.count(), 2)
+
+        latest_attempt = LatestQuizAttempt.objects.get(user=self.user, quiz=self.quiz)
+        self.assertEqual(latest_attempt.result, results.last())
+        self.assertEqual(latest_attempt.completed_at, results.last().updated_at)
+
+    def test_retake_is_allowed_frequency_days_after_the_latest_completion(self):
+        self.quiz.frequency = 7
+        self.quiz.save(update_fields=["frequency"])
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        self.client.post(
+            f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/",
+            data={"answers": [{"question": self.question.id, "answer": self.answer.id}]},
+            format="json",
+        )
+        latest_attempt = LatestQuizAttempt.objects.get(user=self.user, quiz=self.quiz)
+
+        response = self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["available_at"], latest_attempt.completed_at + timedelta(days=7))
+        self.assertFalse(Result.objects.started().for_user(self.user).exists())
+
+        LatestQuizAttempt.objects.filter(id=latest_attempt.id).update(
+            completed_at=timezone.now() - timedelta(days=7)
+        )
+        response = self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_complete_quiz_retry_with_idempotency_key_is_a_no_op(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        url = f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/"
+        answers_data = [{"question": self.question.id, "answer": self.answer.id}]
+
+        response = self.client.post(url, data={"answers": answers_data}, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        # the quiz, the membership check and the completed result
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                url, data={"answers": answers_data}, format="json", HTTP_IDEMPOTENCY_KEY="key-1"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(Result.objects.completed().for_user(self.user).count(), 1)
+        self.assertEqual(Result.objects.started().for_user(self.user).count(), 1)
+        self.assertEqual(UserScoreAggregate.objects.get(user=self.user).completions, 1)
+
+        response = self.client.post(url, data={"answers": answers_data}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(UserScoreAggregate.objects.get(user=self.user).completions, 2)
+
+        other_quiz = Quiz.objects.create(title="Other Quiz", frequency=0, company=self.company)
+        response = self.client.post(
+            f"/api/quiz/quizzes/{other_quiz.id}/complete-quiz/",
+            data={"answers": answers_data},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY="key-1",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_complete_quiz_with_key_taken_by_a_parallel_completion_is_rejected(self):
+        self.client.force_authenticate(user=self.user)
+        other_quiz = Quiz.objects.create(title="Other Quiz", frequency=0, company=self.company)
+        Result.objects.create(
+            user=self.user, quiz=other_quiz, company=self.company, score=1, total_question=1,
+            status=Result.QuizStatus.COMPLETED, idempotency_key="key-1",
+        )
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        answers_data = [{"question": self.question.id, "answer": self.answer.id}]
+
+        # the parallel completion commits after the key was checked
+        with mock.patch("backend.apps.quiz.views.QuizViewSet._completed_attempt_response", return_value=None):
+            response = self.client.post(
+                f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/",
+                data={"answers": answers_data},
+                format="json",
+                HTTP_IDEMPOTENCY_KEY="key-1",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["detail"], "Idempotency key has already been used for another quiz.")
+        self.assertTrue(Result.objects.started().for_user(self.user).filter(quiz=self.quiz).exists())
+
+    def test_complete_quiz_rejects_invalid_idempotency_key(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        url = f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/"
+        answers_data = [{"question": self.question.id, "answer": self.answer.id}]
+
+        for idempotency_key in ["", "   ", "k" * 256]:
+            with self.assertNumQueries(0):
+                response = self.client.post(
+                    url, data={"answers": answers_data}, format="json", HTTP_IDEMPOTENCY_KEY=idempotency_key
+                )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, data={"answers": answers_data}, format="json", HTTP_IDEMPOTENCY_KEY="k" * 255)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_complete_quiz_grades_answers_saved_in_session(self):
+        second_question = Question.objects.create(text="What is 3 + 3?", quiz=self.quiz)
+        second_answer = Answer.objects.create(text="6", is_correct=True, question=second_question)
+        wrong_answer = Answer.objects.create(text="7", is_correct=False, question=second_question)
+        quiz_url = f"/api/quiz/quizzes/{self.quiz.id}"
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(f"{quiz_url}/save-answers/", data={"answers": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        result_id = self.client.post(f"{quiz_url}/start-quiz/", format="json").data["id"]
+        answers = [
+            [{"question": self.question.id, "answer": self.answer.id}],
+            [{"question": second_question.id, "answer": wrong_answer.id}],
+            [{"question": second_question.id, "answer": second_answer.id}],
+        ]
+        for saved_answers in answers:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(f"{quiz_url}/save-answers/", data={"answers": saved_answers}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse([query for query in queries if not query["sql"].startswith("SELECT")])
+
+        response = self.client.get(f"{quiz_url}/session/")
+        self.assertEqual(response.data["result"], result_id)
+        self.assertEqual(
+            response.data["answers"],
+            [
+                {"question": self.question.id, "answer": self.answer.id},
+                {"question": second_question.id, "answer": second_answer.id},
+            ],
+        )
+
+        other_question = Question.objects.create(text="Other", quiz=Quiz.objects.create(title="Other", frequency=0, company=self.company))
+        response = self.client.post(
+            f"{quiz_url}/save-answers/", data={"answers": [{"question": other_question.id, "answer": None}]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{quiz_url}/complete-quiz/", data={}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        result = Result.objects.get(id=result_id)
+        self.assertEqual((result.status, result.score, result.total_question), (Result.QuizStatus.COMPLETED, 2, 2))
+        self.assertIsNone(session_cache.get(f"quiz_session:{result_id}"))
+
+    def test_complete_quiz_ignores_saved_answers_of_removed_questions(self):
+        removed_question = Question.objects.create(text="What is 3 + 3?", quiz=self.quiz)
+        removed_answer = Answer.objects.create(text="6", is_correct=True, question=removed_question)
+        quiz_url = f"/api/quiz/quizzes/{self.quiz.id}"
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"{quiz_url}/start-quiz/", format="json")
+        self.client.post(
+            f"{quiz_url}/save-answers/",
+            data={"answers": [{"question": removed_question.id, "answer": removed_answer.id}]},
+            format="json",
+        )
+
+        self.client.force_authenticate(user=self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"{quiz_url}/remove-question/", data={"question": removed_question.id}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"{quiz_url}/complete-quiz/",
+                data={"answers": [{"question": self.question.id, "answer": self.answer.id}]},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = Result.objects.completed().for_user(self.user).get(quiz=self.quiz)
+        self.assertEqual((result.score, result.total_question), (1, 1))
+
+    def test_parallel_autosaves_keep_every_answer(self):
+        def slow_get_session_answers(result_id):
+            answers = get_session_answers(result_id)
+            # widens the read-modify-write window, so unserialized saves would overwrite each other
+            time.sleep(0.01)
+            return answers
+
+        with mock.patch("backend.apps.quiz.sessions.get_session_answers", side_effect=slow_get_session_answers):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda question: save_session_answers(1, [{"question": question, "answer": question}]), range(8)))
+
+        self.assertEqual(get_session_answers(1), {question: question for question in range(8)})
+        # sessions are kept out of the shared LRU cache
+        self.assertIsNone(cache.get("quiz_session:1"))
+
+    def test_complete_quiz_question_from_other_quiz(self):
+        other_quiz = Quiz.objects.create(title="Other Quiz", frequency=0, company=self.company)
+        other_question = Question.objects.create(text="What is 1 + 1?", quiz=other_quiz)
+        other_answer = Answer.objects.create(text="2", is_correct=True, question=other_question)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+
+        answers_data = [{"question": other_question.id, "answer": other_answer.id}]
+        response = self.client.post(
+            f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/",
+            data={"answers": answers_data},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        result = Result.objects.get(user=self.user, quiz=self.quiz)
+        self.assertEqual(result.status, Result.QuizStatus.STARTED)
+
+    def test_complete_quiz_query_count_is_constant(self):
+        def complete_quiz(questions_count):
+            quiz = Quiz.objects.create(title=f"Quiz {questions_count}", frequency=0, company=self.company)
+            answers_data = []
+            for index in range(questions_count):
+                question = Question.objects.create(text=f"Question {index}", quiz=quiz)
+                answer = Answer.objects.create(text="correct", is_correct=True, question=question)
+                Answer.objects.create(text="wrong", is_correct=False, question=question)
+                answers_data.append({"question": question.id, "answer": answer.id})
+
+            self.client.post(f"/api/quiz/quizzes/{quiz.id}/start-quiz/", format="json")
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    f"/api/quiz/quizzes/{quiz.id}/complete-quiz/",
+                    data={"answers": answers_data},
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(Result.objects.get(user=self.user, quiz=quiz).score, questions_count)
+            return len(queries)
+
+        self.client.force_authenticate(user=self.user)
+        # the first completion also creates the user's score aggregates
+        complete_quiz(1)
+        self.assertEqual(complete_quiz(2), complete_quiz(50))
+
     def test_average_scores(self):
         self.client.force_authenticate(user=self.user)
         self.client.force_authenticate(user=self.owner)
@@ -175,6 +552,25 @@ class QuizTest(APITestCase):
         self.assertEqual(global_results["total_question"], 3)
         self.assertAlmostEqual(global_results["average_score"], 6.67, places=2)  # (2/3)*10
     
+    def test_rebuild_score_aggregates(self):
+        other_company = Company.objects.create(name="Other Company", owner=self.owner)
+        other_quiz = Quiz.objects.create(title="Other Quiz", frequency=0, company=other_company)
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=3, total_question=4, status=Result.QuizStatus.COMPLETED)
+        Result.objects.create(user=self.user, quiz=other_quiz, company=other_company, score=1, total_question=4, status=Result.QuizStatus.COMPLETED)
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=0, total_question=4)
+
+        call_command("rebuild_score_aggregates", stdout=StringIO())
+
+        global_aggregate = UserScoreAggregate.objects.get(user=self.user)
+        self.assertEqual(global_aggregate.total_correct, 4)
+        self.assertEqual(global_aggregate.total_questions, 8)
+        self.assertEqual(global_aggregate.completions, 2)
+
+        company_aggregate = UserCompanyScoreAggregate.objects.get(user=self.user, company=self.company)
+        self.assertEqual(company_aggregate.total_correct, 3)
+        self.assertEqual(company_aggregate.total_questions, 4)
+        self.assertEqual(company_aggregate.completions, 1)
+
     def test_list_average_scores(self):
         Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=8, total_question=10, status=Result.QuizStatus.COMPLETED)
         quiz2 = Quiz.objects.create(title="Second Quiz", frequency=0, company=self.company)
@@ -183,7 +579,7 @@ class QuizTest(APITestCase):
         response = self.client.get("/api/quiz/quizzes/list-average-scores/")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.json()
+        data = response.json()["results"]
 
         self.assertEqual(len(data), 2)
         self.assertEqual(data[0]["quiz_id"], self.quiz.id)
@@ -191,6 +587,18 @@ class QuizTest(APITestCase):
         self.assertAlmostEqual(data[0]["average_score"], 8.0, places=1)
         self.assertAlmostEqual(data[1]["average_score"], 7.0, places=1)
         
+    def test_average_scores_ignore_cursor_pagination(self):
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=1, total_question=2, status=Result.QuizStatus.COMPLETED)
+        Result.objects.create(user=self.owner, quiz=self.quiz, company=self.company, score=2, total_question=2, status=Result.QuizStatus.COMPLETED)
+
+        for url in ["/api/quiz/quizzes/list-average-scores/", "/api/quiz/quizzes/list-average-scores/?pagination=cursor"]:
+            response = self.client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()["results"]
+            self.assertEqual(len(data), 1)
+            self.assertAlmostEqual(data[0]["average_score"], 7.5, places=1)
+
     def test_all_users_average_scores(self):
         Result.objects.create(
             user=self.user,
@@ -215,7 +623,7 @@ class QuizTest(APITestCase):
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(len(data), 2)
 
         self.assertEqual(data[1]["quiz_id"], quiz2.id)
@@ -232,11 +640,564 @@ class QuizTest(APITestCase):
         response = self.client.get(f"/api/quiz/quizzes/average-user-scores/?user={self.user.id}")
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        data = response.json()
+        data = response.json()["results"]
 
         self.assertEqual(len(data), 2)
         self.assertEqual(data[0]["quiz_id"], self.quiz.id)
         self.assertAlmostEqual(data[0]["average_score"], 9.0, places=1)
         self.assertEqual(data[1]["quiz_id"], quiz2.id)
         self.assertAlmostEqual(data[1]["average_score"], 5.0, places=1)
-    
\ No newline at end of file
+    
+
+    def test_list_average_scores_grouped_by_quiz_and_day(self):
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=8, total_question=10, status=Result.QuizStatus.COMPLETED)
+        Result.objects.create(user=self.owner, quiz=self.quiz, company=self.company, score=6, total_question=10, status=Result.QuizStatus.COMPLETED)
+        Result.objects.create(user=self.owner, quiz=self.quiz, company=self.company, score=0, total_question=0, status=Result.QuizStatus.STARTED)
+
+        response = self.client.get("/api/quiz/quizzes/list-average-scores/?bucket=day")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["results"][0]["quiz_id"], self.quiz.id)
+        self.assertAlmostEqual(data["results"][0]["average_score"], 7.0, places=1)
+        self.assertIn("period", data["results"][0])
+
+        response = self.client.get("/api/quiz/quizzes/list-average-scores/?bucket=year")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_quiz_results_streams_every_format(self):
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=1, total_question=1, status=Result.QuizStatus.COMPLETED)
+        Result.objects.create(user=self.owner, quiz=self.quiz, company=self.company, score=0, total_question=1, status=Result.QuizStatus.COMPLETED)
+        url = f"/api/quiz/quizzes/{self.quiz.id}/export-quiz-results/"
+
+        response = self.client.get(url, {"file_format": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,user,company,quiz,score,date passed")
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get(url, {"file_format": "json"})
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual({row["user"] for row in rows}, {self.user.username, self.owner.username})
+
+        response = self.client.get(url, {"file_format": "ndjson"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["quiz"], self.quiz.title)
+
+        response = self.client.get(url, {"file_format": "csv.gz"})
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode().splitlines()
+        self.assertEqual(lines[0], "id,user,company,quiz,score,date passed")
+        self.assertEqual(len(lines), 3)
+
+        response = self.client.get(url, {"file_format": "ndjson.gz"})
+        lines = gzip.decompress(b"".join(response.streaming_content)).splitlines()
+        self.assertEqual(len(lines), 2)
+
+        response = self.client.get(url, {"file_format": "parquet"})
+        frame = pd.read_parquet(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(list(frame.columns), ["id", "user", "company", "quiz", "score", "date_passed"])
+        self.assertEqual(len(frame), 2)
+        self.assertEqual(frame["score"].sum(), 1)
+
+        response = self.client.get(url, {"file_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_query_count_is_constant(self):
+        def export_results():
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    f"/api/quiz/quizzes/{self.quiz.id}/export-quiz-results/", {"file_format": "csv"}
+                )
+                content = b"".join(response.streaming_content)
+            return len(queries), len(content.splitlines()) - 1
+
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=1, total_question=1, status=Result.QuizStatus.COMPLETED)
+        # the first request also caches the company roles of the user
+        export_results()
+        queries_count, rows_count = export_results()
+        self.assertEqual(rows_count, 1)
+
+        users = [
+            CustomUser.objects.create_user(username=f"exported{index}", password="testpassword") for index in range(20)
+        ]
+        for user in users:
+            Result.objects.create(user=user, quiz=self.quiz, company=self.company, score=1, total_question=1, status=Result.QuizStatus.COMPLETED)
+
+        self.assertEqual(export_results(), (queries_count, 21))
+
+    @override_settings(
+        MEDIA_ROOT=tempfile.mkdtemp(), CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    )
+    def test_async_export_job(self):
+        Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, score=1, total_question=1, status=Result.QuizStatus.COMPLETED)
+
+        with mock.patch("backend.apps.quiz.utils.run_export_job.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(
+                    f"/api/companies/companies/{self.company.id}/export-company-results/",
+                    {"file_format": "csv", "async": "true"},
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = ExportJob.objects.get(id=response.data["id"])
+        self.assertEqual(job.status, ExportJob.JobStatus.PENDING)
+        delay.assert_called_once_with(job.id)
+
+        run_export_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.JobStatus.COMPLETED)
+        self.assertEqual(job.progress, 100)
+        self.assertEqual(job.total_rows, 1)
+        self.assertTrue(Notification.objects.filter(user=self.owner, text__contains=f"#{job.id}").exists())
+
+        response = self.client.get(f"/api/quiz/export-jobs/{job.id}/download/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn(self.user.username, lines[1])
+
+    @override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+    def test_async_export_job_fails_when_the_results_cannot_be_read(self):
+        job = ExportJob.objects.create(requested_by=self.owner, company=self.company, file_format="csv")
+
+        with mock.patch("backend.apps.quiz.tasks.get_results_export_queryset", side_effect=DatabaseError("timeout")):
+            run_export_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.JobStatus.FAILED)
+        self.assertEqual(job.error, "timeout")
+        self.assertTrue(Notification.objects.filter(user=self.owner, text__contains=f"#{job.id} has failed").exists())
+
+    def _workbook(self, rows):
+        columns = ["Quiz Title", "Description", "Frequency", "Question Text", "Answer Text", "Is Correct"]
+        workbook = BytesIO()
+        pd.DataFrame(rows, columns=columns).to_excel(workbook, index=False)
+        workbook.seek(0)
+        workbook.name = "quizzes.xlsx"
+        return workbook
+
+    def test_import_quiz_creates_and_updates_quizzes(self):
+        workbook = self._workbook(
+            [
+                ["Sample Quiz", "Updated", 3, "What is 1 + 1?", "2", True],
+                ["Sample Quiz", "Updated", 3, "What is 1 + 1?", "3", False],
+                ["Sample Quiz", "Updated", 3, "What is 2 + 3?", "5", True],
+                ["Sample Quiz", "Updated", 3, "What is 2 + 3?", "6", False],
+                ["New Quiz", None, 1, "Capital of France?", "Paris", True],
+                ["New Quiz", None, 1, "Capital of France?", "Rome", False],
+                ["New Quiz", None, 1, "Capital of Italy?", "Rome", True],
+                ["New Quiz", None, 1, "Capital of Italy?", "Paris", False],
+            ]
+        )
+
+        with mock.patch(
+            "backend.apps.notification.signals.fan_out_quiz_notification.delay", side_effect=fan_out_quiz_notification
+        ) as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f"/api/quiz/quizzes/import-quiz/?company={self.company.id}", {"file": workbook}, format="multipart"
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        delay.assert_called_once_with(response.data["created"][0])
+        self.assertEqual(response.data["updated"], [self.quiz.id])
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual(response.data["questions"], 4)
+        self.assertEqual(response.data["answers"], 8)
+
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.description, "Updated")
+        self.assertEqual(self.quiz.frequency, 3)
+        self.assertFalse(Question.objects.filter(id=self.question.id).exists())
+        self.assertEqual(self.quiz.questions.count(), 2)
+
+        new_quiz = Quiz.objects.get(id=response.data["created"][0])
+        self.assertEqual(new_quiz.questions.count(), 2)
+        self.assertEqual(Answer.objects.filter(question__quiz=new_quiz, is_correct=True).count(), 2)
+        self.assertEqual(Notification.objects.filter(text__contains="'New Quiz'").count(), 2)
+
+    def test_import_quiz_reports_invalid_rows(self):
+        workbook = self._workbook(
+            [
+                ["Broken Quiz", None, -1, "Question 1", "A", True],
+                ["Broken Quiz", None, -1, "Question 1", "B", "maybe"],
+                ["Broken Quiz", None, -1, "Question 2", "A", True],
+                ["Broken Quiz", None, -1, "Question 2", "A", False],
+            ]
+        )
+
+        response = self.client.post(
+            f"/api/quiz/quizzes/import-quiz/?company={self.company.id}", {"file": workbook}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = {error["row"]: error["errors"] for error in response.json()["errors"]}
+        self.assertIn("Frequency must be a non-negative integer.", errors[2])
+        self.assertIn("Is Correct must be true or false.", errors[3])
+        self.assertIn("Answer is duplicated within the question.", errors[5])
+        self.assertFalse(Quiz.objects.filter(title="Broken Quiz").exists())
+
+    def test_import_quiz_from_csv(self):
+        csv_file = BytesIO(
+            b"Quiz Title,Description,Frequency,Question Text,Answer Text,Is Correct\n"
+            b"CSV Quiz,,2,Question 1,A,true\n"
+            b"CSV Quiz,,2,Question 1,B,false\n"
+            b"\n"
+            b"CSV Quiz,,2,Question 2,A,true\n"
+            b"CSV Quiz,,2,Question 2,B,false\n"
+        )
+        csv_file.name = "quizzes.csv"
+
+        response = self.client.post(
+            f"/api/quiz/quizzes/import-quiz/?company={self.company.id}", {"file": csv_file}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["answers"], 4)
+        self.assertEqual(Quiz.objects.get(title="CSV Quiz").frequency, 2)
+
+    def test_load_quiz_import_reads_excel_in_chunks(self):
+        workbook = self._workbook(
+            [
+                ["Chunked Quiz", None, 1, "Question 1", "A", True],
+                ["Chunked Quiz", None, 1, "Question 1", "B", False],
+                ["Chunked Quiz", None, 1, "Question 2", "A", True],
+                ["Chunked Quiz", None, 1, "Question 2", "B", "maybe"],
+                ["Chunked Quiz", None, 1, "Question 2", "C", False],
+            ]
+        )
+        progress = []
+
+        quiz_import = load_quiz_import(self.company, workbook, on_progress=lambda *args: progress.append(args), chunk_size=2)
+
+        # the sheet dimension gives the number of rows before they are read
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual(quiz_import.validate(), [{"row": 5, "errors": ["Is Correct must be true or false."]}])
+        self.assertEqual(len(quiz_import.quizzes["Chunked Quiz"]["questions"]["Question 2"]["answers"]), 2)
+
+    def test_load_quiz_import_estimates_csv_rows_from_bytes_read(self):
+        rows = b"".join(b"CSV Quiz %d,,2,Question %d,Answer %d,true\n" % (row // 40, row // 4, row) for row in range(40000))
+        csv_file = BytesIO(b"Quiz Title,Description,Frequency,Question Text,Answer Text,Is Correct\n" + rows)
+        csv_file.name = "quizzes.csv"
+        progress = []
+
+        load_quiz_import(self.company, csv_file, on_progress=lambda *args: progress.append(args), chunk_size=5000)
+
+        self.assertEqual([rows_read for rows_read, _total_rows in progress], list(range(5000, 40001, 5000)))
+        self.assertGreater(progress[0][1], progress[0][0])
+        self.assertLessEqual(progress[0][1], 40000 * 1.1)
+        self.assertEqual(progress[-1], (40000, 40000))
+
+    @override_settings(
+        MEDIA_ROOT=tempfile.mkdtemp(), CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    )
+    def test_async_import_job(self):
+        valid = self._workbook(
+            [
+                ["Async Quiz", None, 1, "Question 1", "A", True],
+                ["Async Quiz", None, 1, "Question 1", "B", False],
+                ["Async Quiz", None, 1, "Question 2", "A", True],
+                ["Async Quiz", None, 1, "Question 2", "B", False],
+            ]
+        )
+        invalid = self._workbook([["Async Quiz", None, 1, "Question 1", "A", "maybe"]])
+
+        jobs = []
+        for workbook in [valid, invalid]:
+            with mock.patch("backend.apps.quiz.views.run_import_job.delay") as delay:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        f"/api/quiz/quizzes/import-quiz/?company={self.company.id}&async=true",
+                        {"file": workbook},
+                        format="multipart",
+                    )
+
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            delay.assert_called_once_with(response.data["id"])
+            jobs.append(ImportJob.objects.get(id=response.data["id"]))
+
+        self.assertFalse(Quiz.objects.filter(title="Async Quiz").exists())
+
+        with mock.patch("backend.apps.quiz.tasks.update_job_progress", wraps=update_job_progress) as progress:
+            for job in jobs:
+                run_import_job(job.id)
+        # progress is reported against the rows of the sheet while it is parsed
+        progress.assert_any_call(jobs[0], 4, 4)
+
+        response = self.client.get(f"/api/quiz/import-jobs/{jobs[0].id}/")
+        self.assertEqual(response.data["status"], ImportJob.JobStatus.COMPLETED)
+        self.assertEqual(response.data["progress"], 100)
+        self.assertEqual(response.data["total_rows"], 4)
+        self.assertEqual(response.data["report"]["questions"], 2)
+        self.assertTrue(Quiz.objects.filter(title="Async Quiz", company=self.company).exists())
+
+        response = self.client.get(f"/api/quiz/import-jobs/{jobs[1].id}/")
+        self.assertEqual(response.data["status"], ImportJob.JobStatus.FAILED)
+        self.assertIn("Is Correct must be true or false.", response.data["errors"][0]["errors"])
+        self.assertTrue(Notification.objects.filter(user=self.owner, text__contains=f"#{jobs[1].id}").exists())
+
+    def test_quiz_reminders_are_sent_for_due_pairs(self):
+        weekly_quiz = Quiz.objects.create(title="Weekly Quiz", frequency=7, company=self.company)
+        recent_result = Result.objects.create(
+            user=self.user,
+            quiz=weekly_quiz,
+            company=self.company,
+            score=1,
+            total_question=1,
+            status=Result.QuizStatus.COMPLETED,
+        )
+        old_result = Result.objects.create(
+            user=self.owner,
+            quiz=weekly_quiz,
+            company=self.company,
+            score=1,
+            total_question=1,
+            status=Result.QuizStatus.COMPLETED,
+        )
+        Result.objects.filter(id=old_result.id).update(updated_at=timezone.now() - timedelta(days=8))
+        old_result.refresh_from_db()
+        for result in [recent_result, old_result]:
+            record_latest_attempt(result)
+        call_command("rebuild_quiz_reminder_schedules", stdout=StringIO())
+
+        self.assertEqual(list(iter_due_reminder_user_chunks(chunk_size=1)), [[self.owner.id], [self.user.id]])
+
+        with (
+            override_settings(QUIZ_REMINDER_EMAIL_BATCH_SIZE=1, QUIZ_REMINDER_EMAILS_PER_SECOND=0.5),
+            mock.patch("backend.apps.quiz.tasks.send_quiz_reminder_batch.delay", side_effect=send_quiz_reminder_batch),
+            mock.patch("backend.apps.shared.utils.get_connection", wraps=get_connection) as connection,
+            mock.patch("backend.apps.shared.utils.time.sleep") as sleep,
+        ):
+            self.assertEqual(send_quiz_reminders(), 2)
+
+        connection.assert_called_once()
+        self.assertEqual(sleep.call_count, 2)
+        self.assertGreater(sleep.call_args.args[0], 1)
+
+        emails = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn("- Sample Quiz\n- Weekly Quiz", emails[self.owner.email].body)
+        self.assertEqual(emails[self.user.email].subject, "It's time to take another quiz!")
+
+    def test_quiz_reminder_schedules_follow_membership_completion_and_frequency(self):
+        self.assertEqual(
+            set(QuizReminderSchedule.objects.values_list("user_id", "quiz_id")),
+            {(self.owner.id, self.quiz.id), (self.user.id, self.quiz.id)},
+        )
+
+        new_member = CustomUser.objects.create_user(username="newmember", password="testpassword")
+        new_member.companies.add(self.company)
+        self.assertTrue(QuizReminderSchedule.objects.filter(user=new_member, quiz=self.quiz).exists())
+
+        self.company.members.remove(new_member)
+        self.assertFalse(QuizReminderSchedule.objects.filter(user=new_member).exists())
+
+        Quiz.objects.filter(id=self.quiz.id).update(frequency=7)
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/", format="json")
+        self.client.post(
+            f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/",
+            data={"answers": [{"question": self.question.id, "answer": self.answer.id}]},
+            format="json",
+        )
+
+        result = Result.objects.get(user=self.user, quiz=self.quiz)
+        schedule = QuizReminderSchedule.objects.get(user=self.user, quiz=self.quiz)
+        self.assertEqual(schedule.next_due, result.updated_at + timedelta(days=7))
+
+        self.client.force_authenticate(user=self.owner)
+        self.client.patch(f"/api/quiz/quizzes/{self.quiz.id}/", data={"frequency": 3}, format="json")
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_due, result.updated_at + timedelta(days=3))
+        self.assertEqual(
+            get_due_reminders_by_user([self.owner.id, self.user.id], timezone.now()), {self.owner: [self.quiz]}
+        )
+
+
+class ResultQueryPlanTest(TestCase):
+    """
+    The hot result queries must be answered from their named indexes on a seeded and analyzed dataset,
+    with the default planner settings, so a dropped or unusable index shows up as a different plan.
+    """
+
+    USERS = 100
+    COMPANIES = 20
+    QUIZZES_PER_COMPANY = 2
+    COMPLETED_ATTEMPTS = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = CustomUser.objects.create_user(username="owner", password="testpassword")
+        companies = Company.objects.bulk_create(
+            [Company(name=f"Plan Company {index}", owner=owner) for index in range(cls.COMPANIES)]
+        )
+        users = CustomUser.objects.bulk_create([CustomUser(username=f"plan_user_{index}") for index in range(cls.USERS)])
+        quizzes = Quiz.objects.bulk_create(
+            [
+                Quiz(title=f"Quiz {index}", frequency=1, company=company)
+                for company in companies
+                for index in range(cls.QUIZZES_PER_COMPANY)
+            ]
+        )
+        # every user has completed every quiz a few times and has one started attempt of it
+        Result.objects.bulk_create(
+            [
+                Result(
+                    user=user,
+                    quiz=quiz,
+                    company_id=quiz.company_id,
+                    score=attempt,
+                    total_question=5,
+                    status=Result.QuizStatus.COMPLETED if attempt < cls.COMPLETED_ATTEMPTS else Result.QuizStatus.STARTED,
+                )
+                for user in users
+                for quiz in quizzes
+                for attempt in range(cls.COMPLETED_ATTEMPTS + 1)
+            ],
+            batch_size=2000,
+        )
+        cls.company = companies[0]
+        cls.user = users[0]
+        cls.quiz = quizzes[0]
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE quiz_result")
+
+    @staticmethod
+    def indexes_on(*columns):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Result._meta.db_table)
+        return [name for name, constraint in constraints.items() if constraint["columns"] == list(columns)]
+
+    def assert_uses_index(self, queryset, *index_names):
+        plan = queryset.explain()
+        self.assertTrue(
+            any(re.search(rf"\b{index_name}\b", plan) for index_name in index_names),
+            msg=f"None of {index_names} in the plan of {queryset.query}:\n{plan}",
+        )
+
+    def test_hot_result_queries_use_indexes(self):
+        completed = Result.objects.completed()
+        queries = [
+            (
+                Result.objects.started().for_user(self.user).filter(quiz=self.quiz),
+                ["quiz_result_one_started_attempt", "quiz_result_user_quiz_idx"],
+            ),
+            (completed.for_user(self.user).order_by("-updated_at"), ["quiz_result_user_completed_idx"]),
+            (
+                completed.for_user(self.user).for_quiz(self.quiz).values("quiz_id").annotate(last=Max("updated_at")),
+                ["quiz_result_user_quiz_idx"],
+            ),
+            (
+                completed.for_quiz(self.quiz).values("user_id").annotate(last=Max("updated_at")),
+                # SQLite may skip-scan the covering (user, quiz, status, updated_at) index, already grouped by user
+                ["quiz_result_quiz_completed_idx", "quiz_result_user_quiz_idx"],
+            ),
+            (
+                completed.for_company(self.company).values("user_id").annotate(last=Max("updated_at")),
+                ["quiz_result_comp_completed_idx"],
+            ),
+            # the exports are ordered by id, the foreign key index may be preferred as it avoids the sort
+            (
+                get_results_export_queryset(quiz=self.quiz),
+                ["quiz_result_quiz_completed_idx", *self.indexes_on("quiz_id")],
+            ),
+            (
+                get_results_export_queryset(user=self.user),
+                ["quiz_result_user_completed_idx", *self.indexes_on("user_id")],
+            ),
+        ]
+
+        for queryset, index_names in queries:
+            with self.subTest(query=str(queryset.query)):
+                self.assert_uses_index(queryset, *index_names)
+
+    def test_one_started_attempt_per_user_and_quiz(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Result.objects.create(user=self.user, quiz=self.quiz, company=self.company, total_question=5)
+
+        Result.objects.create(
+            user=self.user,
+            quiz=self.quiz,
+            company=self.company,
+            total_question=5,
+            status=Result.QuizStatus.COMPLETED,
+        )
+
+    def test_check_result_consistency(self):
+        other_company = Company.objects.create(name="Other Company", owner=self.user)
+        Result.objects.for_user(self.user).for_quiz(self.quiz).update(company=other_company)
+
+        with self.assertRaises(CommandError):
+            call_command("check_result_consistency", stdout=StringIO())
+
+        UserCompanyScoreAggregate.objects.create(user=self.user, company=other_company, completions=3)
+
+        call_command("check_result_consistency", "--fix", stdout=StringIO())
+
+        self.assertFalse(Result.objects.for_company(other_company).exists())
+        self.assertFalse(UserCompanyScoreAggregate.objects.filter(company=other_company).exists())
+        self.assertEqual(
+            UserCompanyScoreAggregate.objects.get(user=self.user, company=self.company).completions,
+            Result.objects.completed().for_user(self.user).for_company(self.company).count(),
+        )
+        call_command("check_result_consistency", stdout=StringIO())
+
+
+@skipUnless(connection.features.has_select_for_update, "The attempt protocol relies on row locks.")
+class QuizAttemptConcurrencyTest(TransactionTestCase):
+    """
+    Load test of parallel start and complete calls of one user, as sent by a client retrying under burst load.
+    """
+
+    THREADS = 8
+
+    def setUp(self):
+        cache.clear()
+        owner = CustomUser.objects.create_user(username="owner", password="testpassword")
+        self.user = CustomUser.objects.create_user(username="member", password="testpassword")
+        company = Company.objects.create(name="Load Company", owner=owner)
+        company.members.add(self.user)
+        with mock.patch("backend.apps.notification.signals.fan_out_quiz_notification.delay"):
+            self.quiz = Quiz.objects.create(title="Load Quiz", frequency=1, company=company)
+        question = Question.objects.create(text="What is 2 + 2?", quiz=self.quiz)
+        self.answer = Answer.objects.create(text="4", is_correct=True, question=question)
+        Answer.objects.create(text="5", is_correct=False, question=question)
+
+    def _run_in_parallel(self, request):
+        barrier = threading.Barrier(self.THREADS)
+
+        def call():
+            client = APIClient()
+            client.force_authenticate(user=self.user)
+            barrier.wait()
+            try:
+                return request(client).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as executor:
+            return list(executor.map(lambda _index: call(), range(self.THREADS)))
+
+    def test_parallel_starts_and_retried_completions(self):
+        start_url = f"/api/quiz/quizzes/{self.quiz.id}/start-quiz/"
+        complete_url = f"/api/quiz/quizzes/{self.quiz.id}/complete-quiz/"
+        answers_data = {"answers": [{"question": self.answer.question_id, "answer": self.answer.id}]}
+
+        statuses = self._run_in_parallel(lambda client: client.post(start_url, format="json"))
+        self.assertEqual(statuses, [status.HTTP_200_OK] * self.THREADS)
+        self.assertEqual(Result.objects.started().for_user(self.user).count(), 1)
+
+        statuses = self._run_in_parallel(
+            lambda client: client.post(complete_url, data=answers_data, format="json", HTTP_IDEMPOTENCY_KEY="retry")
+        )
+        self.assertEqual(statuses, [status.HTTP_200_OK] * self.THREADS)
+
+        result = Result.objects.for_user(self.user).get()
+        self.assertEqual(result.status, Result.QuizStatus.COMPLETED)
+        self.assertEqual(result.score, 1)
+        self.assertEqual(UserScoreAggregate.objects.get(user=self.user).completions, 1)
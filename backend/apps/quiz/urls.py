@@ -5,5 +5,7 @@ from . import views
 router = DefaultRouter()
 router.register("quizzes", views.QuizViewSet, basename="quiz-management")
 router.register("results", views.ResultDetailViewSet, basename="result-detail")
+router.register("export-jobs", views.ExportJobViewSet, basename="export-jobs")
+router.register("import-jobs", views.ImportJobViewSet, basename="import-jobs")
 
 urlpatterns = [] + router.urls
@@ -1,23 +1,37 @@
-import csv
-import json
+from functools import partial
 
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Case, F, FloatField, Max, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Trunc
 from django.db.models.query import QuerySet
-from django.http import HttpResponse
-from rest_framework import status
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers, status
+from rest_framework.request import Request
 from rest_framework.response import Response
 
 from backend.apps.company.models import Company
-from backend.apps.quiz.models import Quiz, Result
+from backend.apps.quiz.exports import EXPORT_FORMATS, export_response, get_results_export_queryset
+from backend.apps.quiz.models import (
+    Answer,
+    ExportJob,
+    LatestQuizAttempt,
+    Question,
+    Quiz,
+    Result,
+    ScoreAggregate,
+    UserCompanyScoreAggregate,
+    UserScoreAggregate,
+)
 from backend.apps.quiz.schemas import QuizResult
-from backend.apps.quiz.serializers import QuizSerializer, ResultExportSerializer
+from backend.apps.quiz.serializers import ExportJobSerializer
+from backend.apps.quiz.tasks import run_export_job
+from backend.apps.users.models import CustomUser
 
 
-def calculate_quiz_result(queryset: QuerySet[Result]) -> dict[str, float]:
-    aggregated_data = queryset.aggregate(total_correct=Sum("score"), total_questions=Sum("total_question"))
-
-    total_correct = aggregated_data.get("total_correct") or 0
-    total_question = aggregated_data.get("total_questions") or 0
+def calculate_quiz_result(aggregate: ScoreAggregate | None) -> dict[str, float]:
+    total_correct = aggregate.total_correct if aggregate else 0
+    total_question = aggregate.total_questions if aggregate else 0
 
     if total_question > 0:
         average_percentage = total_correct / total_question
@@ -36,89 +50,136 @@ def calculate_quiz_result(queryset: QuerySet[Result]) -> dict[str, float]:
     return result.model_dump()
 
 
-def export_csv(results: QuerySet[Result]) -> HttpResponse:
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={"Content-Disposition": 'attachment; filename="quiz_results.csv"'},
+def update_score_aggregates(result: Result) -> None:
+    """
+    Function to add a completed result to the user's global and per company score aggregates.
+    Must be called inside the transaction that completes the result.
+    """
+    increments = {
+        "total_correct": F("total_correct") + result.score,
+        "total_questions": F("total_questions") + result.total_question,
+        "completions": F("completions") + 1,
+        "last_completed_at": result.updated_at,
+    }
+    initial = {
+        "total_correct": result.score,
+        "total_questions": result.total_question,
+        "completions": 1,
+        "last_completed_at": result.updated_at,
+    }
+    aggregates = [
+        (UserScoreAggregate, {"user_id": result.user_id}),
+        (UserCompanyScoreAggregate, {"user_id": result.user_id, "company_id": result.company_id}),
+    ]
+
+    for model, lookup in aggregates:
+        if model.objects.filter(**lookup).update(**increments):
+            continue
+
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **initial)
+        except IntegrityError:
+            # a concurrent completion created the row first
+            model.objects.filter(**lookup).update(**increments)
+
+
+def record_latest_attempt(result: Result) -> None:
+    """
+    Function to point the latest attempt of the user for the quiz at a completed result, in one upsert.
+    Must be called inside the transaction that completes the result.
+    """
+    LatestQuizAttempt.objects.bulk_create(
+        [
+            LatestQuizAttempt(
+                user_id=result.user_id, quiz_id=result.quiz_id, result=result, completed_at=result.updated_at
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["user", "quiz"],
+        update_fields=["result", "completed_at"],
     )
 
-    writer = csv.writer(response)
-    writer.writerow(["id", "user", "company", "quiz", "score", "date passed"])
 
-    serializer = ResultExportSerializer(results, many=True)
+def get_quiz_answer_key(quiz: Quiz) -> dict[int, int | None]:
+    """
+    Function to load the answer key of the quiz (question id -> correct answer id) in one query.
+    """
+    correct_answer = Answer.objects.filter(question=OuterRef("pk"), is_correct=True).values("id")[:1]
+    questions = Question.objects.filter(quiz=quiz).annotate(correct_answer_id=Subquery(correct_answer))
 
-    for result in serializer.data:
-        writer.writerow(
-            [result["id"], result["user"], result["company"], result["quiz"], result["score"], result["date_passed"]]
-        )
+    return dict(questions.values_list("id", "correct_answer_id"))
 
-    return response
 
+def grade_quiz_answers(answer_key: dict[int, int | None], user_answers: list[dict]) -> int:
+    """
+    Function to grade the submitted answers against the answer key in memory.
+    Every submitted question must belong to the quiz and may be answered only once.
+    """
+    if not isinstance(user_answers, list):
+        raise serializers.ValidationError({"answers": _("Answers must be a list.")})
 
-def export_json(results: QuerySet[Result]) -> HttpResponse:
-    serializer = ResultExportSerializer(results, many=True)
+    score = 0
+    answered_questions = set()
 
-    json_data = json.dumps(serializer.data, indent=4)
+    for user_answer in user_answers:
+        question_id = user_answer.get("question") if isinstance(user_answer, dict) else None
 
-    response = HttpResponse(
-        json_data,
-        content_type="application/json",
-        headers={"Content-Disposition": 'attachment; filename="quiz_results.json"'},
-    )
-    return response
+        if question_id not in answer_key:
+            raise serializers.ValidationError({"answers": _("Question does not belong to this quiz.")})
+        if question_id in answered_questions:
+            raise serializers.ValidationError({"answers": _("Each question can be answered only once.")})
 
+        answered_questions.add(question_id)
+        correct_answer_id = answer_key[question_id]
+        if correct_answer_id is not None and correct_answer_id == user_answer.get("answer"):
+            score += 1
 
-def calculate_average_quiz_scores(results: QuerySet[Result]) -> list[dict[str, str | float]]:
-    average_scores = []
+    return score
 
-    for result in results:
-        correct_answers = result.score
-        total_questions = result.total_question
 
-        if total_questions > 0:
-            average_score = round((correct_answers / total_questions) * 10, 2)
-        else:
-            average_score = 0.0
+def export_results(
+    request: Request, quiz: Quiz | None = None, user: CustomUser | None = None, company: Company | None = None
+) -> Response | StreamingHttpResponse:
+    """
+    Function to export the completed results in the requested file format.
+    The file is streamed in the response or, with ?async=true, written by a background job.
+    """
+    file_format = request.query_params.get("file_format")
 
-        average_scores.append(
-            {
-                "quiz_id": result.quiz.id,
-                "title": result.quiz.title,
-                "average_score": average_score,
-                "timestamp": result.updated_at,
-            }
+    if file_format not in EXPORT_FORMATS:
+        return Response({"detail": _("Invalid format.")}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.query_params.get("async", "").lower() == "true":
+        job = ExportJob.objects.create(
+            requested_by=request.user, quiz=quiz, user=user, company=company, file_format=file_format
         )
+        transaction.on_commit(partial(run_export_job.delay, job.id))
+        return Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-    return average_scores
+    return export_response(get_results_export_queryset(quiz=quiz, user=user, company=company), file_format)
 
 
-def create_or_update_quiz_via_excel(file_data, company: Company) -> Response:
+def calculate_average_quiz_scores(results: QuerySet[Result], bucket: str | None = None) -> QuerySet:
     """
-    Function to create or update quiz via an Excel file.
+    Function to aggregate average quiz scores in the database, grouped by quiz
+    and optionally by a time bucket (day, week or month) of the completion date.
     """
-    quiz_dict = {}
-    quiz = None
-
-    for quiz_title, quiz_data in file_data:
-        quiz = Quiz.objects.filter(title=quiz_title, company=company).first()
-        questions_data = []
-        for question_text, question_group in quiz_data.groupby("Question Text"):
-            answers_data = []
-            for _, row in question_group.iterrows():
-                answers_data.append({"text": row["Answer Text"], "is_correct": bool(row["Is Correct"])})
-            questions_data.append({"text": question_text, "answers": answers_data})
-
-        quiz_dict = {
-            "title": quiz_title,
-            "description": quiz_data.iloc[0]["Description"],
-            "frequency": quiz_data.iloc[0]["Frequency"],
-            "company": company.id,
-            "questions": questions_data,
-        }
-
-        quiz_serializer = QuizSerializer(quiz, data=quiz_dict) if quiz else QuizSerializer(data=quiz_dict)
-
-    quiz_serializer.is_valid(raise_exception=True)
-    quiz_serializer.save()
-
-    return Response(quiz_serializer.data, status=status.HTTP_201_CREATED)
+    group_by = ["quiz_id"]
+
+    if bucket:
+        results = results.annotate(period=Trunc("updated_at", bucket))
+        group_by.append("period")
+
+    result_score = Case(
+        When(total_question=0, then=Value(0.0)),
+        default=Cast("score", FloatField()) * 10 / Cast("total_question", FloatField()),
+        output_field=FloatField(),
+    )
+
+    return (
+        results.order_by()
+        .values(*group_by, title=F("quiz__title"))
+        .annotate(average_score=Avg(result_score), timestamp=Max("updated_at"))
+        .order_by(*group_by)
+    )
@@ -1,36 +1,60 @@
-import pandas as pd
+from datetime import timedelta
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import serializers, status, viewsets
 from rest_framework.decorators import action, parser_classes
-from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from backend.apps.company.models import Company
-from backend.apps.quiz.enums import FileFormatEnum
+from backend.apps.quiz.cache import bump_quiz_content_version, get_quiz_content
+from backend.apps.quiz.enums import TimeBucketEnum
 from backend.apps.quiz.filters import QuizFilter, ResultFilter
-from backend.apps.quiz.models import Answer, Question, Quiz, Result
-from backend.apps.quiz.pagination import QuizPagination
+from backend.apps.quiz.importers import load_quiz_import
+from backend.apps.quiz.models import (
+    ExportJob,
+    ImportJob,
+    LatestQuizAttempt,
+    Question,
+    Quiz,
+    Result,
+    UserCompanyScoreAggregate,
+    UserScoreAggregate,
+)
+from backend.apps.quiz.pagination import AverageScorePagination, QuizPagination, ResultPagination
 from backend.apps.quiz.permissions import IsCompanyMember, IsOwnerOrAdmin
+from backend.apps.quiz.reminders import reschedule_reminder
 from backend.apps.quiz.serializers import (
+    ExportJobSerializer,
+    ImportJobSerializer,
     QuestionSerializer,
     QuizAverageScoreSerializer,
     QuizResultSerializer,
     QuizSerializer,
     ResultSerializer,
 )
+from backend.apps.quiz.sessions import delete_session, get_session_answers, merge_session_answers, save_session_answers
+from backend.apps.quiz.tasks import run_import_job
 from backend.apps.quiz.utils import (
     calculate_average_quiz_scores,
     calculate_quiz_result,
-    create_or_update_quiz_via_excel,
-    export_csv,
-    export_json,
+    export_results,
+    get_quiz_answer_key,
+    grade_quiz_answers,
+    record_latest_attempt,
+    update_score_aggregates,
 )
 from backend.apps.users.models import CustomUser
 
+START_QUIZ_ATTEMPTS = 3
+
 
 # Create your views here.
 class QuizViewSet(viewsets.ModelViewSet):
@@ -46,6 +70,20 @@ class QuizViewSet(viewsets.ModelViewSet):
             return [IsOwnerOrAdmin(), IsAuthenticated()]
         return super().get_permissions()
 
+    def retrieve(self, request, *args, **kwargs):
+        # the content is cached under the integer id the version is bumped for, "05" is quiz 5
+        try:
+            quiz_id = int(self.kwargs["pk"])
+        except ValueError as e:
+            raise Http404 from e
+
+        data = get_quiz_content(quiz_id, "detail", lambda: dict(self.get_serializer(self.get_object()).data))
+        return Response(data)
+
+    def perform_destroy(self, instance):
+        bump_quiz_content_version(instance.id)
+        instance.delete()
+
     @action(detail=True, methods=["patch"], url_path="add-question", permission_classes=[IsOwnerOrAdmin])
     def add_question(self, request, pk=None):
         quiz = self.get_object()
@@ -53,6 +91,7 @@ class QuizViewSet(viewsets.ModelViewSet):
 
         if serializer.is_valid():
             serializer.save(quiz=quiz)
+            bump_quiz_content_version(quiz.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -70,20 +109,43 @@ class QuizViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError({"detail": _("Question does not belong to this quiz.")})
 
         question.delete()
+        bump_quiz_content_version(quiz.id)
         return Response({"detail": _("Question removed successfully.")}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], url_path="start-quiz", permission_classes=[IsCompanyMember])
     def start_quiz(self, request, pk=None):
         quiz = self.get_object()
         user = request.user
-        questions_count = quiz.questions.count()
 
-        result, created = Result.objects.get_or_create(
-            user=user, company=quiz.company, quiz=quiz, total_question=questions_count
+        # a completed quiz can be retaken `frequency` days after its latest completion
+        last_completed_at = (
+            LatestQuizAttempt.objects.filter(user=user, quiz=quiz).values_list("completed_at", flat=True).first()
         )
+        if last_completed_at is not None:
+            available_at = last_completed_at + timedelta(days=quiz.frequency)
+            if timezone.now() < available_at:
+                return Response(
+                    {"detail": _("You have already completed this quiz."), "available_at": available_at},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        if not created and result.status == Result.QuizStatus.COMPLETED:
-            return Response({"detail": _("You have already completed this quiz.")}, status=status.HTTP_400_BAD_REQUEST)
+        total_question = quiz.questions.count()
+
+        # a user has at most one started attempt of a quiz, it is resumed until it is completed,
+        # the insert is skipped on conflict, so parallel starts share the same attempt
+        for _attempt in range(START_QUIZ_ATTEMPTS):
+            Result.objects.bulk_create(
+                [Result(user=user, quiz=quiz, company_id=quiz.company_id, total_question=total_question)],
+                ignore_conflicts=True,
+            )
+            # the conflicting attempt may have been completed in between, then the insert is retried
+            result = Result.objects.started().for_user(user).filter(quiz=quiz).first()
+            if result is not None:
+                break
+        else:
+            return Response(
+                {"detail": _("Quiz could not be started, please try again.")}, status=status.HTTP_409_CONFLICT
+            )
 
         serializer = ResultSerializer(result, data={"state": Result.QuizStatus.STARTED}, partial=True)
         serializer.is_valid(raise_exception=True)
@@ -91,51 +153,139 @@ class QuizViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"], url_path="complete-quiz", permission_classes=[IsCompanyMember])
     def complete_quiz(self, request, pk=None):
+        idempotency_key = self._get_idempotency_key(request)
         quiz = self.get_object()
         user = request.user
 
-        try:
-            result = Result.objects.get(user=user, quiz=quiz, status=Result.QuizStatus.STARTED)
-        except Result.DoesNotExist:
-            return Response(
-                {"detail": _("Quiz has not been started or already completed.")},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        if idempotency_key and (response := self._completed_attempt_response(user, quiz, idempotency_key)):
+            return response
+
+        started_id = self._started_result_id(user, quiz)
+        if started_id is None:
+            return self._not_started_response(user, quiz, idempotency_key)
+
+        answer_key = get_quiz_content(quiz.id, "answer_key", lambda: get_quiz_answer_key(quiz))
+        # the answers saved in the session are graded together with the submitted ones
+        user_answers = merge_session_answers(get_session_answers(started_id), request.data.get("answers"), answer_key)
+        if not user_answers:
+            raise serializers.ValidationError({"detail": _("Answers are required.")})
+
+        score = grade_quiz_answers(answer_key, user_answers)
+
+        with transaction.atomic():
+            # the started attempt is locked, a parallel completion waits and then finds it completed
+            result = Result.objects.started().filter(id=started_id).select_for_update().first()
+            if result is None:
+                return self._not_started_response(user, quiz, idempotency_key)
+
+            result.score = score
+            result.total_question = len(user_answers)
+            result.status = Result.QuizStatus.COMPLETED
+            result.idempotency_key = idempotency_key
+            try:
+                # a parallel completion of another quiz may have taken the key after it was checked
+                with transaction.atomic():
+                    result.save(update_fields=["score", "total_question", "status", "idempotency_key", "updated_at"])
+            except IntegrityError:
+                return self._key_used_response()
+            update_score_aggregates(result)
+            record_latest_attempt(result)
+            reschedule_reminder(user.id, quiz, result.updated_at)
+            delete_session(result.id)
+
+        return Response({"detail": _("Quiz completed successfully.")}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _started_result_id(user, quiz):
+        return Result.objects.started().for_user(user).filter(quiz=quiz).values_list("id", flat=True).first()
+
+    def _not_started_response(self, user, quiz, idempotency_key=None):
+        if idempotency_key and (response := self._completed_attempt_response(user, quiz, idempotency_key)):
+            return response
+        return Response(
+            {"detail": _("Quiz has not been started or already completed.")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=True, methods=["post"], url_path="save-answers", permission_classes=[IsCompanyMember])
+    def save_answers(self, request, pk=None):
+        """
+        Method to autosave answers of the started attempt in its session, without writing to the database.
+        """
+        quiz = self.get_object()
+        result_id = self._started_result_id(request.user, quiz)
+        if result_id is None:
+            return self._not_started_response(request.user, quiz)
 
         user_answers = request.data.get("answers")
         if not user_answers:
             raise serializers.ValidationError({"detail": _("Answers are required.")})
 
-        score = 0
-        for user_answer in user_answers:
-            question = get_object_or_404(Question, id=user_answer.get("question"))
-            correct_answer = get_object_or_404(Answer, question=question, is_correct=True)
-            if correct_answer.id == user_answer.get("answer"):
-                score += 1
+        answer_key = get_quiz_content(quiz.id, "answer_key", lambda: get_quiz_answer_key(quiz))
+        # grading validates the submitted questions, the score is computed on completion
+        grade_quiz_answers(answer_key, user_answers)
+        answers = save_session_answers(result_id, user_answers)
+
+        return Response(self._session_data(result_id, answers), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"], url_path="session", permission_classes=[IsCompanyMember])
+    def session(self, request, pk=None):
+        quiz = self.get_object()
+        result_id = self._started_result_id(request.user, quiz)
+        if result_id is None:
+            return self._not_started_response(request.user, quiz)
+
+        return Response(self._session_data(result_id, get_session_answers(result_id)), status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _session_data(result_id, answers):
+        return {
+            "result": result_id,
+            "answers": [{"question": question, "answer": answer} for question, answer in answers.items()],
+        }
 
-        result.score = score
-        result.total_question = len(user_answers)
-        result.status = Result.QuizStatus.COMPLETED
-        result.save()
+    @staticmethod
+    def _get_idempotency_key(request):
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is None:
+            return None
 
+        max_length = Result._meta.get_field("idempotency_key").max_length
+        if not idempotency_key.strip() or len(idempotency_key) > max_length:
+            message = _("Idempotency key must be between 1 and %(max_length)s characters.") % {"max_length": max_length}
+            raise serializers.ValidationError({"detail": message})
+        return idempotency_key
+
+    @classmethod
+    def _completed_attempt_response(cls, user, quiz, idempotency_key):
+        """
+        Method to answer a retried completion, found by its idempotency key, without grading it again.
+        """
+        result = Result.objects.completed().for_user(user).filter(idempotency_key=idempotency_key).first()
+
+        if result is None:
+            return None
+        if result.quiz_id != quiz.id:
+            return cls._key_used_response()
         return Response({"detail": _("Quiz completed successfully.")}, status=status.HTTP_200_OK)
 
+    @staticmethod
+    def _key_used_response():
+        return Response(
+            {"detail": _("Idempotency key has already been used for another quiz.")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
     @action(detail=True, methods=["get"], url_path="results", permission_classes=[IsCompanyMember])
     def get_scores(self, request, pk=None):
         quiz = self.get_object()
         user = request.user
 
-        company = quiz.company
-
-        company_queryset = Result.objects.filter(
-            user=user, status=Result.QuizStatus.COMPLETED, quiz__company=company
-        ).values("score", "total_question")
-        company_results = calculate_quiz_result(company_queryset)
+        company_aggregate = UserCompanyScoreAggregate.objects.filter(user=user, company_id=quiz.company_id).first()
+        company_results = calculate_quiz_result(company_aggregate)
 
-        global_queryset = Result.objects.filter(user=user, status=Result.QuizStatus.COMPLETED).values(
-            "score", "total_question"
-        )
-        global_results = calculate_quiz_result(global_queryset)
+        global_aggregate = UserScoreAggregate.objects.filter(user=user).first()
+        global_results = calculate_quiz_result(global_aggregate)
 
         company_results_serialized = QuizResultSerializer(company_results).data
         global_results_serialized = QuizResultSerializer(global_results).data
@@ -150,45 +300,34 @@ class QuizViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"], url_path="export-quiz-results", permission_classes=[IsOwnerOrAdmin])
     def export_quiz_results(self, request, pk=None):
         quiz = self.get_object()
-        file_format = request.query_params.get("file_format")
-
-        results = Result.objects.filter(quiz=quiz, status=Result.QuizStatus.COMPLETED).select_related("quiz")
-
-        if file_format == FileFormatEnum.CSV.value:
-            return export_csv(results)
-        elif file_format == FileFormatEnum.JSON.value:
-            return export_json(results)
-
-        return Response({"detail": _("Invalid format.")}, status=status.HTTP_400_BAD_REQUEST)
+        return export_results(request, quiz=quiz)
 
     @action(detail=False, methods=["get"], url_path="export-user-results", permission_classes=[IsAuthenticated])
     def export_user_results(self, request):
         user = request.user
-        file_format = request.query_params.get("file_format")
+        return export_results(request, user=user)
+
+    def _average_scores_response(self, results):
+        bucket = self.request.query_params.get("bucket")
 
-        results = Result.objects.filter(user=user, status=Result.QuizStatus.COMPLETED).select_related("quiz")
+        if bucket and bucket not in [time_bucket.value for time_bucket in TimeBucketEnum]:
+            return Response({"detail": _("Invalid time bucket.")}, status=status.HTTP_400_BAD_REQUEST)
 
-        if file_format == FileFormatEnum.CSV.value:
-            return export_csv(results)
-        elif file_format == FileFormatEnum.JSON.value:
-            return export_json(results)
+        paginator = AverageScorePagination()
+        page = paginator.paginate_queryset(calculate_average_quiz_scores(results, bucket), self.request, view=self)
+        serializer = QuizAverageScoreSerializer(page, many=True)
 
-        return Response({"detail": _("Invalid format.")}, status=status.HTTP_400_BAD_REQUEST)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=False, methods=["get"], url_path="list-average-scores")
     def list_average_scores(self, request):
-        results = Result.objects.filter(status=Result.QuizStatus.COMPLETED).select_related("quiz")
-        serializer = QuizAverageScoreSerializer(calculate_average_quiz_scores(results), many=True)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        results = Result.objects.completed()
+        return self._average_scores_response(results)
 
     @action(detail=False, methods=["get"], url_path="all-users-scores")
     def all_users_average_scores(self, request):
-        users_ids = CustomUser.objects.values_list("id", flat=True)
-        results = Result.objects.filter(user__in=users_ids, status=Result.QuizStatus.COMPLETED).select_related("quiz")
-        serializer = QuizAverageScoreSerializer(calculate_average_quiz_scores(results), many=True)
-
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        results = Result.objects.completed()
+        return self._average_scores_response(results)
 
     @action(detail=False, methods=["get"], url_path="average-user-scores")
     def average_user_scores(self, request):
@@ -198,54 +337,78 @@ class QuizViewSet(viewsets.ModelViewSet):
             return Response({"detail": _("User ID is required.")}, status=status.HTTP_400_BAD_REQUEST)
 
         user = get_object_or_404(CustomUser, id=user_id)
-        results = Result.objects.filter(user=user, status=Result.QuizStatus.COMPLETED).select_related("quiz")
-
-        serializer = QuizAverageScoreSerializer(calculate_average_quiz_scores(results), many=True)
+        results = Result.objects.completed().for_user(user)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._average_scores_response(results)
 
     @parser_classes([MultiPartParser])
     @action(detail=False, methods=["post"], url_path="import-quiz", permission_classes=[IsOwnerOrAdmin])
     def import_quiz(self, request):
         """
-        Method to create or update quiz via excel
+        Method to create or update quizzes via excel.
+        With ?async=true the file is stored and imported by a background job.
         """
         company_id = request.query_params.get("company")
         file = request.FILES.get("file")
 
-        try:
-            df = pd.read_excel(file)
+        if not company_id:
+            return Response({"detail": _("Company ID is required.")}, status=status.HTTP_400_BAD_REQUEST)
+        if not file:
+            return Response({"detail": _("File is required.")}, status=status.HTTP_400_BAD_REQUEST)
 
-            required_columns = ["Quiz Title", "Description", "Frequency", "Question Text", "Answer Text", "Is Correct"]
+        company = get_object_or_404(Company, id=company_id)
 
-            if not all(col in df.columns for col in required_columns):
-                return Response(
-                    {"detail": "Excel file must contain the required columns: " + ", ".join(required_columns)},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        if request.query_params.get("async", "").lower() == "true":
+            job = ImportJob.objects.create(requested_by=request.user, company=company, file=file)
+            transaction.on_commit(partial(run_import_job.delay, job.id))
+            return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-            if not company_id:
-                return Response({"detail": "Company ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+        quiz_import = load_quiz_import(company, file)
 
-            company = get_object_or_404(Company, id=company_id)
-            grouped = df.groupby("Quiz Title")
-
-            return create_or_update_quiz_via_excel(grouped, company)
+        errors = quiz_import.validate()
+        if errors:
+            return Response(
+                {"detail": _("Import file contains invalid rows."), "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        except ValidationError as e:
-            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response({"detail": f"Error importing quiz: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(quiz_import.save(), status=status.HTTP_201_CREATED)
 
 
 class ResultDetailViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ResultSerializer
     permission_classes = [IsAuthenticated, IsCompanyMember]
-    queryset = Result.objects.all()
+    queryset = Result.objects.order_by("-created_at", "-id")
     filter_backends = [DjangoFilterBackend]
     filterset_class = ResultFilter
+    pagination_class = ResultPagination
 
     def get_permissions(self):
         if self.action == "list":
             return [IsAuthenticated(), IsOwnerOrAdmin()]
         return super().get_permissions()
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user).order_by("-created_at")
+
+    @action(detail=True, methods=["get"], url_path="download")
+    def download(self, request, pk=None):
+        job = self.get_object()
+
+        if job.status != ExportJob.JobStatus.COMPLETED:
+            return Response({"detail": _("Export is not ready yet.")}, status=status.HTTP_400_BAD_REQUEST)
+
+        return FileResponse(job.file.open("rb"), as_attachment=True, filename=f"quiz_results.{job.file_format}")
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ImportJob.objects.filter(requested_by=self.request.user).order_by("-created_at")
@@ -8,3 +8,20 @@ class TimeStamp(models.Model):
 
     class Meta:
         abstract = True
+
+
+class BackgroundJob(TimeStamp):
+    class JobStatus(models.TextChoices):
+        PENDING = "Pending"
+        RUNNING = "Running"
+        COMPLETED = "Completed"
+        FAILED = "Failed"
+
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        abstract = True
@@ -0,0 +1,160 @@
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Keyset pagination on (created_at, id), backed by the composite index of the paginated model.
+    The cursor holds the (created_at, id) of the last row and the next page is read with
+    created_at > x OR (created_at = x AND id > y), so it neither counts nor skips rows with OFFSET.
+    """
+
+    ordering = ("created_at", "id")
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.request = request
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor.reverse)
+        position = self._decode_position(cursor.position) if cursor and cursor.position else None
+
+        # a previous page is read backwards from its first row
+        ordering = [self._invert(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[: self.page_size + 1])
+        has_following_rows = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        self.has_next = position is not None if reverse else has_following_rows
+        self.has_previous = has_following_rows if reverse else position is not None
+        self.first_position = self._get_position(self.page[0]) if self.page else position
+        self.last_position = self._get_position(self.page[-1]) if self.page else position
+        self.display_page_controls = False
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            pagination.Cursor(offset=0, reverse=False, position=self._encode_position(self.last_position))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(
+            pagination.Cursor(offset=0, reverse=True, position=self._encode_position(self.first_position))
+        )
+
+    @staticmethod
+    def _invert(field: str) -> str:
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def _after(ordering: list[str], position: tuple[datetime, int]) -> Q:
+        (first, second), (first_value, second_value) = ordering, position
+
+        def lookup(field):
+            return field.lstrip("-") + ("__lt" if field.startswith("-") else "__gt")
+
+        return Q(**{lookup(first): first_value}) | Q(**{first.lstrip("-"): first_value, lookup(second): second_value})
+
+    def _get_position(self, row) -> tuple[datetime, int]:
+        created_at, pk = (field.lstrip("-") for field in self.ordering)
+        return getattr(row, created_at), getattr(row, pk)
+
+    @staticmethod
+    def _encode_position(position: tuple[datetime, int]) -> str:
+        return f"{position[0].isoformat()}|{position[1]}"
+
+    def _decode_position(self, position: str) -> tuple[datetime, int]:
+        try:
+            created_at, pk = position.split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except ValueError as e:
+            raise NotFound(self.invalid_cursor_message) from e
+
+
+class PageNumberOrKeysetPagination(pagination.BasePagination):
+    """
+    Page number pagination by default, keyset pagination with ?pagination=cursor.
+    The next and previous links of a keyset page carry the cursor, so the whole walk stays on keyset pagination.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = KeysetPagination.ordering
+    pagination_query_param = "pagination"
+    keyset_value = "cursor"
+
+    paginator = None
+
+    def use_keyset(self, request) -> bool:
+        return (
+            request.query_params.get(self.pagination_query_param) == self.keyset_value
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def get_paginator(self, request) -> pagination.BasePagination:
+        if self.use_keyset(request):
+            paginator = KeysetPagination()
+            paginator.ordering = self.ordering
+        else:
+            paginator = pagination.PageNumberPagination()
+
+        paginator.page_size = self.page_size
+        paginator.page_size_query_param = self.page_size_query_param
+        paginator.max_page_size = self.max_page_size
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return pagination.PageNumberPagination().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = pagination.PageNumberPagination().get_schema_operation_parameters(view)
+        names = {parameter["name"] for parameter in parameters}
+        parameters += [
+            parameter
+            for parameter in KeysetPagination().get_schema_operation_parameters(view)
+            if parameter["name"] not in names
+        ]
+        parameters.append(
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Use keyset pagination on (created_at, id) with the value 'cursor'.",
+                "schema": {"type": "string", "enum": [self.keyset_value]},
+            }
+        )
+        return parameters
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, "display_page_controls", False)
@@ -1,7 +1,10 @@
-from collections.abc import Callable
+import time
+from collections.abc import Callable, Iterable, Iterator
+from itertools import islice
+from typing import Any
 
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.db.models import Model
 from rest_framework import status
 from rest_framework.response import Response
@@ -31,17 +34,57 @@ def update_instance_status(
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-def send_email_quiz_notification(user: CustomUser, quiz: Quiz) -> None:
+def update_job_progress(job: Model, processed_rows: int, total_rows: int) -> None:
     """
-    Function to send email notification to a user about a quiz.
+    Function to store the progress of a background job without touching its other fields
     """
-    subject = "It's time to take another quiz!"
+    progress = min(100, processed_rows * 100 // total_rows) if total_rows else 0
+    type(job).objects.filter(pk=job.pk).update(processed_rows=processed_rows, progress=progress)
+
+
+def build_quiz_reminder_email(user: CustomUser, quizzes: list[Quiz]) -> EmailMessage:
+    """
+    Function to build one reminder email listing every quiz the user is due to take.
+    """
+    subject = "It's time to take another quiz!" if len(quizzes) == 1 else "It's time to take your quizzes!"
+    quiz_list = "\n".join(f"- {quiz.title}" for quiz in quizzes)
     message = (
         f"Hi {user.first_name},\n\n"
-        f"You haven't attempted the quiz '{quiz.title}' in a while. "
-        f"Don't miss the opportunity to take this quiz"
+        f"You haven't attempted these quizzes in a while:\n{quiz_list}\n\n"
+        f"Don't miss the opportunity to take them"
     )
-    email_from = settings.EMAIL_HOST_USER
-    recipient_list = [user.email]
 
-    send_mail(subject, message, email_from, recipient_list)
+    return EmailMessage(subject, message, settings.EMAIL_HOST_USER, [user.email])
+
+
+def send_quiz_reminder_emails(reminders: dict[CustomUser, list[Quiz]]) -> int:
+    """
+    Function to send one digest email per user over a single SMTP connection, in batches of
+    QUIZ_REMINDER_EMAIL_BATCH_SIZE messages and no faster than QUIZ_REMINDER_EMAILS_PER_SECOND.
+    """
+    batch_size = settings.QUIZ_REMINDER_EMAIL_BATCH_SIZE
+    emails_per_second = settings.QUIZ_REMINDER_EMAILS_PER_SECOND
+    messages = [build_quiz_reminder_email(user, quizzes) for user, quizzes in reminders.items() if user.email]
+    sent = 0
+
+    with get_connection() as connection:
+        for start in range(0, len(messages), batch_size):
+            batch = messages[start : start + batch_size]
+            started = time.monotonic()
+            sent += connection.send_messages(batch) or 0
+
+            if emails_per_second:
+                # wait until the batch fits the allowed rate before the next one is sent
+                time.sleep(max(0.0, len(batch) / emails_per_second - (time.monotonic() - started)))
+
+    return sent
+
+
+def batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Function to split the items into lists of at most size items, without reading the items ahead.
+    """
+    items = iter(items)
+
+    while batch := list(islice(items, size)):
+        yield batch
@@ -45,6 +45,9 @@ class CustomUser(TimeStamp, AbstractUser):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = ["first_name", "last_name", "email"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [models.Index(fields=["created_at", "id"])]
+
     def __str__(self):
         return self.username
 
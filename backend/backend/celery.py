@@ -15,7 +15,7 @@ app.conf.update(
     CELERY_BROKER_URL=settings.CELERY_BROKER_URL,
     CELERY_BEAT_SCHEDULE={
         "quiz_notification": {
-            "task": "backend.apps.quiz.tasks.notify_users",
+            "task": "backend.apps.quiz.tasks.send_quiz_reminders",
             "schedule": timedelta(days=1),
         },
     },
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 from django.utils.timezone import timedelta
@@ -117,6 +118,43 @@ CHANNEL_LAYERS = {
     },
 }
 
+# CACHE
+# Quiz content is cached in the Redis at REDIS_CACHE_URL, shared by the web and worker processes, so a
+# version bumped by one process is seen by all of them. It evicts the least recently used keys once full.
+# The cache Redis is a separate instance (the cache service of docker-compose), the broker and channel
+# layer Redis must never evict keys. Tests run against a local memory cache.
+# Quiz sessions hold autosaved answers that can't be rebuilt, they live in their own alias on a Redis
+# that never evicts keys (a database of the broker instance by default).
+
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
+
+QUIZ_CACHE_TIMEOUT = int(os.getenv("QUIZ_CACHE_TIMEOUT", 60 * 60))
+COMPANY_ROLES_CACHE_TIMEOUT = int(os.getenv("COMPANY_ROLES_CACHE_TIMEOUT", 5 * 60))
+QUIZ_SESSION_TIMEOUT = int(os.getenv("QUIZ_SESSION_TIMEOUT", 24 * 60 * 60))
+QUIZ_SESSION_CACHE_ALIAS = "quiz_sessions"
+
+if TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+        QUIZ_SESSION_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": QUIZ_SESSION_CACHE_ALIAS,
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_CACHE_URL", "redis://cache:6379/0"),
+        },
+        QUIZ_SESSION_CACHE_ALIAS: {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("QUIZ_SESSION_REDIS_URL", "redis://redis:6379/1"),
+        },
+    }
+
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
@@ -161,6 +199,9 @@ EMAIL_PORT = os.getenv("EMAIL_PORT", default="587")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = True
+# Quiz reminders are sent as one digest per user, in batches over one SMTP connection.
+QUIZ_REMINDER_EMAIL_BATCH_SIZE = int(os.getenv("QUIZ_REMINDER_EMAIL_BATCH_SIZE", 100))
+QUIZ_REMINDER_EMAILS_PER_SECOND = float(os.getenv("QUIZ_REMINDER_EMAILS_PER_SECOND", 10))
 
 # LOGGING
 